@@ -0,0 +1,218 @@
+#%% Bikeshare: Command-Line Entry Point Running One Pipeline Stage at a Time
+# Libraries
+import os
+import sys
+import time
+import argparse
+import importlib
+
+
+# Outputs Persisted by Each Stage, Relative to Filepath
+STAGE_FILES = {"trips_raw": "data/stages/trips_raw.parquet",
+               "stations": "data/stages/stations.parquet",
+               "regression": "data/stages/regression.parquet",
+               "flow_daily": "data/panel/net_flow_daily.parquet",
+               "flow_hourly": "data/panel/net_flow_hourly.parquet",
+               "panel_hourly": "data/panel/panel_hourly.npz",
+               "treated": "data/panel/treated.csv",
+               "cohorts": "data/panel/cohorts.parquet",
+               "store": "data/panel"}
+
+# Import Times Recorded by Load, in Order of First Import
+IMPORT_TIMES = []
+
+
+# Define Function for Importing Modules Only When a Stage Needs Them
+def load(*names):
+    modules = []
+    for name in names:
+        start = time.perf_counter()
+        modules.append(importlib.import_module(name))
+        IMPORT_TIMES.append((name, time.perf_counter() - start))
+    return modules[0] if len(modules) == 1 else modules
+
+
+# Define Function for Reporting Import Times
+def import_report(elapsed):
+    total = sum(seconds for _, seconds in IMPORT_TIMES)
+    print(f"{'module':<32}{'seconds':>10}", file = sys.stderr)
+    for name, seconds in sorted(IMPORT_TIMES, key = lambda item: -item[1]):
+        print(f"{name:<32}{seconds:>10.3f}", file = sys.stderr)
+    print(f"{'total imports':<32}{total:>10.3f}", file = sys.stderr)
+    print(f"{'stage total':<32}{elapsed:>10.3f}", file = sys.stderr)
+
+
+# Define Function for Locating Stage Output
+def stage_path(args, key):
+    return args.filepath + STAGE_FILES[key]
+
+
+# Ingest: Read Raw Trip Files and Assign Bixi Station IDs
+def run_ingest(args):
+    ridership = load("ridership")
+    df = ridership.import_data(args.filepath)
+    os.makedirs(os.path.dirname(stage_path(args, "trips_raw")), exist_ok = True)
+    df.to_parquet(stage_path(args, "trips_raw"), index = False)
+
+
+# Clean: Clean Trips, Create Outcomes, and Write Station Panels
+def run_clean(args):
+    np, pd, ridership, validation, net_flow, panel_builder, panel_store = load(
+        "numpy", "pandas", "ridership", "validation", "net_flow", "panel_builder", "panel_store")
+    df = pd.read_parquet(stage_path(args, "trips_raw"))
+    df = ridership.clean_data(df)
+    df = ridership.trip_outcomes(df)
+
+    # Validate Trips, Quarantining Those Failing Data-Quality Rules
+    df, df_quality = validation.validate_trips(df, args.filepath + "data/quarantine/trips.parquet")
+    print(df_quality)
+    df_quality.to_csv(args.filepath + "output/data_quality_counts.csv", index = False)
+
+    # Exclude Round Trips from Trip Distance
+    df["trip_distance"] = df["trip_distance"].replace(0, np.nan)
+
+    # Station Net Flow and Hourly Station Panel
+    os.makedirs(stage_path(args, "store"), exist_ok = True)
+    net_flow.net_flow_panel(df, freq = "h").to_parquet(stage_path(args, "flow_hourly"), index = False)
+    net_flow.net_flow_panel(df, freq = "D").to_parquet(stage_path(args, "flow_daily"), index = False)
+    panel_builder.save_panel(panel_builder.build_panel(df,
+                                                       grain = "hour",
+                                                       start = "2014-01-01",
+                                                       end = "2024-07-31 23:59:59"),
+                             stage_path(args, "panel_hourly"))
+
+    # Write Station-Day Panel Store, Including Days Without Trips, and Station-Year Table
+    panel_store.write_panel_store(df,
+                                  stage_path(args, "store"),
+                                  ["trip_count", "trip_distance", "trip_duration"],
+                                  start = "2014-01-01",
+                                  end = "2024-07-31")
+    ridership.station_table(df).to_parquet(stage_path(args, "stations"), index = False)
+
+
+# Treat: Assign Bixi Stations to Treatment and to Bike Path Opening Cohorts
+def run_treat(args):
+    pd, gpd, treatment, staggered_did = load("pandas", "geopandas", "treatment", "staggered_did")
+    df_stations = pd.read_parquet(stage_path(args, "stations"), columns = ["start_id", "start_lat", "start_long"])
+    df_paths = gpd.read_file(args.filepath + "data/bike_network/reseau_cyclable.geojson")
+
+    # Assign Bixi Stations to Treatment
+    df_rev = df_paths[df_paths['ID_CYCL'].isin(staggered_did.REV_AXIS1)]
+    df_treated = treatment.assign_stations_to_treatment(df_stations, df_rev)
+    df_treated.to_csv(stage_path(args, "treated"), index = False)
+
+    # Assign Bixi Stations to Cohorts of Protected Bike Path Openings
+    df_cohorts = pd.DataFrame({"cohort": ["REV Axis 1"],
+                               "id_cycl": [staggered_did.REV_AXIS1],
+                               "opening_date": pd.to_datetime(["2020-11-07"])})
+    df_station_coords = df_stations.groupby("start_id")[["start_lat", "start_long"]].mean().reset_index().dropna()
+    staggered_did.assign_cohorts(df_station_coords, df_paths, df_cohorts).to_parquet(stage_path(args, "cohorts"), index = False)
+
+
+# Prepare: Build Weekly Regression Dataset
+def run_prepare(args):
+    pd, treatment, regression, panel_store = load("pandas", "treatment", "regression", "panel_store")
+    df_weekly = panel_store.weekly_outcomes(panel_store.open_panel_store(stage_path(args, "store")),
+                                            stations = pd.read_parquet(stage_path(args, "stations")))
+    df_weekly = treatment.add_treatment(df_weekly, pd.read_csv(stage_path(args, "treated")), date_col = "weekly_date")
+    df_regression = regression.prepare_regressions(df_weekly,
+                                                   flows = pd.read_parquet(stage_path(args, "flow_daily")),
+                                                   filepath = args.filepath)
+    df_regression.to_parquet(stage_path(args, "regression"), index = False)
+
+
+# Estimate: Estimate Standard, Matched, Hourly, and Staggered Treatment Effects
+def run_estimate(args):
+    pd, estimation, matching, panel_builder, panel_store, staggered_did = load(
+        "pandas", "estimation", "matching", "panel_builder", "panel_store", "staggered_did")
+    df_regression = pd.read_parquet(stage_path(args, "regression"))
+
+    # Perform Estimation for Various Outcomes
+    estimation.estimation(df_regression,
+                          ["trip_count_sa", "trip_distance_sa", "trip_duration_sa", "arrivals_sa", "net_flow_sa"],
+                          ["standard"],
+                          filepath = args.filepath)
+
+    # Perform Estimation on Matched Sample
+    matcher = matching.build_matcher(matching.station_covariates(df_regression))
+    estimation.estimation(df_regression,
+                          ["trip_count_sa", "trip_distance_sa", "trip_duration_sa"],
+                          ["standard"],
+                          weights = matching.match_controls(matcher, k = 3, caliper = 1.0, replace = True),
+                          filepath = args.filepath)
+
+    # Estimate Treatment Effect by Hour of Day on Hourly Panel
+    panel_hourly = panel_builder.load_panel(stage_path(args, "panel_hourly"))
+    df_treated = pd.read_csv(stage_path(args, "treated"))
+    df_hourly_results = pd.DataFrame([panel_builder.sparse_twfe(panel_hourly, "trip_count", df_treated, "2020-11-07", hour = hour)
+                                      for hour in range(24)])
+    print(df_hourly_results)
+    df_hourly_results.to_csv(args.filepath + "output/regression_twfe_hourly_trip_count.csv", index = False)
+
+    # Estimate Group-Time ATTs on Weekly Trips, and Aggregate to Event Study and Overall ATT
+    store = panel_store.open_panel_store(stage_path(args, "store"))
+    weekly_trips, weeks = panel_store.aggregate_slice(panel_store.panel_slice(store, "trip_count")[0], store["dates"], "W")
+    df_att, differences = staggered_did.group_time_att(weekly_trips, store["stations"], weeks.values, pd.read_parquet(stage_path(args, "cohorts")))
+    df_event_study, overall_att = staggered_did.aggregate_att(df_att, differences)
+    print(df_event_study)
+    print(overall_att)
+    df_att.to_csv(args.filepath + "output/staggered_group_time_att.csv", index = False)
+    df_event_study.to_csv(args.filepath + "output/staggered_event_study.csv", index = False)
+
+
+# Plot: Render Exploration and Parallel Trends Figures
+def run_plot(args):
+    pd, exploration, panel_store = load("pandas", "exploration", "panel_store")
+    exploration.exploration_figures(panel_store.open_panel_store(stage_path(args, "store")), args.filepath)
+    if os.path.exists(stage_path(args, "regression")):
+        exploration.did_plot(pd.read_parquet(stage_path(args, "regression")),
+                             ["trip_count_sa", "trip_distance_sa", "trip_duration_sa"],
+                             args.filepath)
+
+
+# Map: Create Usage and Treatment Status Maps
+def run_map(args):
+    pd, gpd, treatment, mapping, panel_store, staggered_did = load(
+        "pandas", "geopandas", "treatment", "mapping", "panel_store", "staggered_did")
+    store = panel_store.open_panel_store(stage_path(args, "store"))
+    df_stations = pd.read_parquet(stage_path(args, "stations"))
+
+    # Map of Usage by Bixi Station
+    mapping.map_station_usage(mapping.usage_table(panel_store.weekly_outcomes(store, stations = df_stations, totals = True)),
+                              type = "gif",
+                              filepath = args.filepath)
+
+    # Map of REV Path, Treated Bixi Stations, and Control Bixi Stations
+    df_weekly = treatment.add_treatment(panel_store.weekly_outcomes(store, stations = df_stations),
+                                        pd.read_csv(stage_path(args, "treated")),
+                                        date_col = "weekly_date")
+    mapping.treatment_status_table(df_weekly).to_excel(args.filepath + "data/bike_network/station_treatment_status.xlsx")
+    df_paths = gpd.read_file(args.filepath + "data/bike_network/reseau_cyclable.geojson")
+    df_rev = df_paths[df_paths['ID_CYCL'].isin(staggered_did.REV_AXIS1)]
+    mapping.map_rev_treated_control(gpd.GeoDataFrame(df_rev, geometry='geometry'), args.filepath)
+
+
+# Stages, in Pipeline Order
+STAGES = {"ingest": run_ingest,
+          "clean": run_clean,
+          "treat": run_treat,
+          "prepare": run_prepare,
+          "estimate": run_estimate,
+          "plot": run_plot,
+          "map": run_map}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog = "bikeshare", description = "Run one stage of the Bixi ridership pipeline.")
+    parser.add_argument("stage", choices = list(STAGES))
+    parser.add_argument("--filepath", default = "")
+    parser.add_argument("--profile-imports", action = "store_true")
+    args = parser.parse_args()
+
+    # Run Stage, Reporting Import Times Even if Stage Fails
+    start = time.perf_counter()
+    try:
+        STAGES[args.stage](args)
+    finally:
+        if args.profile_imports:
+            import_report(time.perf_counter() - start)
@@ -0,0 +1,129 @@
+#%% Crosswalk: Compiled Bixi Station ID Lookup
+# Libraries
+import os
+import re
+import difflib
+import unicodedata
+import numpy as np
+import pandas as pd
+
+
+# Define Function for Folding Accents, Case, and Whitespace in Station Names
+def normalize_name(name):
+    name = unicodedata.normalize("NFKD", str(name))
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    return re.sub(r"\s+", " ", name.casefold()).strip()
+
+
+# Define Function for Hashing Station Name-Year Pairs
+def name_year_hash(names, years):
+    keys = np.char.add(np.char.add(np.asarray(years, dtype = "int64").astype(str), "|"), np.asarray(names, dtype = "str"))
+    return pd.util.hash_array(keys.astype(object))
+
+
+# Define Function for Compiling Crosswalk into Sorted Hash Tables
+def compile_crosswalk(xlsx_path, cache_path):
+    # Reuse Compiled Crosswalk Unless Excel Sheet Has Changed
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(xlsx_path):
+        with np.load(cache_path) as f:
+            return dict(f)
+
+    # Read Crosswalk
+    df_stations = pd.read_excel(xlsx_path)
+    df_stations = df_stations.dropna(subset = ["name", "year", "id"])
+    df_stations["norm_name"] = df_stations["name"].map(normalize_name)
+
+    # Exact Keys on Raw Names
+    exact = df_stations.drop_duplicates(subset = ["name", "year"])
+    exact_keys = name_year_hash(exact["name"], exact["year"])
+    exact_order = np.argsort(exact_keys)
+
+    # Folded Keys on Normalized Names, Dropping Names That Fold onto Different IDs
+    folded = df_stations.groupby(["norm_name", "year"]).filter(lambda g: g["id"].nunique() == 1)
+    folded = folded.drop_duplicates(subset = ["norm_name", "year"])
+    folded_keys = name_year_hash(folded["norm_name"], folded["year"])
+    folded_order = np.argsort(folded_keys)
+
+    # Store Sorted Keys and Row Attributes
+    crosswalk = {
+        "exact_keys": exact_keys[exact_order],
+        "exact_id": exact["id"].to_numpy(dtype = "int64")[exact_order],
+        "exact_lat": exact["latitude"].to_numpy(dtype = "float64")[exact_order],
+        "exact_long": exact["longitude"].to_numpy(dtype = "float64")[exact_order],
+        "folded_keys": folded_keys[folded_order],
+        "folded_name": folded["norm_name"].to_numpy(dtype = "str")[folded_order],
+        "folded_year": folded["year"].to_numpy(dtype = "int64")[folded_order],
+        "folded_id": folded["id"].to_numpy(dtype = "int64")[folded_order],
+        "folded_lat": folded["latitude"].to_numpy(dtype = "float64")[folded_order],
+        "folded_long": folded["longitude"].to_numpy(dtype = "float64")[folded_order]}
+    np.savez(cache_path, **crosswalk)
+
+    # Return Compiled Crosswalk
+    return crosswalk
+
+
+# Define Function for Looking Up Hashes in Sorted Key Array
+def lookup(sorted_keys, keys):
+    pos = np.searchsorted(sorted_keys, keys)
+    pos = np.minimum(pos, len(sorted_keys) - 1)
+    return np.where(sorted_keys[pos] == keys, pos, -1)
+
+
+# Define Function for Matching Distinct Station Names to Crosswalk
+def match_names(crosswalk, names, years, cutoff = 0.9):
+    # Exact Match on Raw Name
+    names = np.asarray(names, dtype = object)
+    years = np.asarray(years, dtype = "int64")
+    exact = lookup(crosswalk["exact_keys"], name_year_hash(names, years))
+    station_id = np.where(exact >= 0, crosswalk["exact_id"][exact], -1)
+    lat = np.where(exact >= 0, crosswalk["exact_lat"][exact], np.nan)
+    long = np.where(exact >= 0, crosswalk["exact_long"][exact], np.nan)
+
+    # Folded Match on Normalized Name
+    norm_names = np.array([normalize_name(name) for name in names], dtype = object)
+    folded = lookup(crosswalk["folded_keys"], name_year_hash(norm_names, years))
+    folded = np.where(exact >= 0, -1, folded)
+
+    # Fuzzy Match on Normalized Name, Only for Remaining Unmatched Names
+    for i in np.flatnonzero((exact < 0) & (folded < 0) & (norm_names != "")):
+        candidates = np.flatnonzero(crosswalk["folded_year"] == years[i])
+        match = difflib.get_close_matches(norm_names[i], crosswalk["folded_name"][candidates].tolist(), n = 1, cutoff = cutoff)
+        if match:
+            folded[i] = candidates[crosswalk["folded_name"][candidates] == match[0]][0]
+
+    # Fill Folded and Fuzzy Matches
+    hit = folded >= 0
+    station_id[hit] = crosswalk["folded_id"][folded[hit]]
+    lat[hit] = crosswalk["folded_lat"][folded[hit]]
+    long[hit] = crosswalk["folded_long"][folded[hit]]
+
+    # Return Matches
+    return station_id, lat, long
+
+
+# Define Function for Assigning Station IDs and Coordinates to Trips
+def assign_station_ids(data, crosswalk, type):
+    # Identify Distinct Station Name-Year Pairs
+    name_codes, name_uniques = pd.factorize(data[f"{type}_name"])
+    years = data["year"].fillna(0).to_numpy(dtype = "int64")
+    pair_codes, pair_uniques = pd.factorize(name_codes.astype("int64") * 10000 + years)
+    pair_names = np.asarray(name_uniques, dtype = object)[pair_uniques // 10000]
+    pair_names = np.where(pair_uniques // 10000 >= 0, pair_names, "")
+
+    # Match Distinct Pairs and Broadcast to Trips by Array Lookup
+    station_id, lat, long = match_names(crosswalk, pair_names, pair_uniques % 10000)
+    station_id = station_id[pair_codes]
+    data[f"{type}_id"] = np.where(station_id >= 0, station_id, np.nan)
+    data[f"{type}_lat"] = lat[pair_codes]
+    data[f"{type}_long"] = long[pair_codes]
+
+    # Return DataFrame
+    return data
+
+
+# Define Function for Reporting Crosswalk Match Rate by Year
+def match_rate(data):
+    df_rate = data.groupby("year").agg(
+        start_match = ("start_id", lambda x: x.notna().mean()),
+        end_match = ("end_id", lambda x: x.notna().mean())).reset_index()
+    return df_rate
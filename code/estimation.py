@@ -0,0 +1,97 @@
+#%% Estimation: Difference-in-Differences Models of REV Treatment Effect
+# Libraries
+import numpy as np
+import pandas as pd
+from statsmodels.regression.linear_model import OLS, WLS
+from statsmodels.tools.tools import add_constant
+
+
+# Define Function for Estimating Treatment Effect
+def estimation(data, outcomes, models, weights = None, filepath = ""):
+    # Restrict Sample to Matched Stations
+    suffix = ""
+    if weights is not None:
+        data = pd.merge(data,
+                        weights[["start_id", "weight"]],
+                        on = "start_id",
+                        how = "inner")
+        suffix = "_matched"
+    weight_col = ["weight"] if weights is not None else []
+
+    # Spillover Controls from Spatial Features, Used in Fourth Specification Only
+    spillover_cols = ["neighbours_250m", "neighbours_500m", "neighbours_1000m", "treated_distance", "neighbour_lag_ridership"]
+
+    # Iterate Over Models
+    for model in models:
+        # Standard Difference-in-Differences Model
+        if model == "standard":
+            # Iterate Over Specifications
+            for spec in range(1,5):
+                # Iterate Over Outcomes
+                for outcome in outcomes:
+                    # Duplicate DataFrame
+                    df_est = data
+
+                    # Retain Relevant Variables
+                    df_est = df_est[[outcome, "treated", "post", "rev_distance", "cbd_distance", "temp", "precip", "snow_ground"] + [f"month_{i}" for i in range(1, 12)] + weight_col + (spillover_cols if spec == 4 else [])]
+                    df_est['interaction'] = df_est["treated"]*df_est["post"]
+                    df_est["rev_distance"] = df_est["rev_distance"] / 1000
+                    df_est = df_est.replace([np.inf, -np.inf], np.nan).dropna()
+
+                    # Specify Outcome and Regressors
+                    y = df_est[outcome]
+
+                    if spec == 1:
+                        X = add_constant(df_est[['post', 'treated', 'interaction']])
+                    if spec == 2:
+                        X = add_constant(df_est[['post', 'treated', 'interaction', "rev_distance", "cbd_distance"]])
+                    if spec == 3:
+                        X = add_constant(df_est[['post', 'treated', 'interaction', "rev_distance", "cbd_distance", "temp", "precip", "snow_ground"]])
+                    if spec == 4:
+                        X = add_constant(df_est[['post', 'treated', 'interaction', "rev_distance", "cbd_distance", "temp", "precip", "snow_ground"] + spillover_cols])
+
+                    # Estimate Model
+                    if weights is None:
+                        result = OLS(y, X).fit(cov_type = "HC3")
+                    else:
+                        result = WLS(y, X, weights = df_est["weight"]).fit(cov_type = "HC3")
+                    summary = result.summary()
+
+                    # View Estimation Results
+                    print(summary)
+
+                    # Save Estimation Results as LaTeX File
+                    with open(filepath + f'output/regression_{model}_{spec}_{outcome}{suffix}.tex', 'w') as f:
+                        f.write(summary.as_latex())
+
+        # Two-Way Fixed Effects
+        elif model == "twfe":
+            # Imported Here, as Only Fixed Effects Models Need linearmodels
+            from linearmodels.panel import PanelOLS
+            for outcome in outcomes:
+                # Duplicate DataFrame
+                df_est = data
+
+                # Retain Relevant Variables
+                df_est = df_est[[outcome, "start_id", "weekly_date", "treated", "post"] + weight_col]
+                df_est['interaction'] = df_est["treated"] * df_est["post"]
+                df_est = df_est.replace([np.inf, -np.inf], np.nan).dropna()
+                if not isinstance(df_est.index, pd.MultiIndex):
+                    df_est = df_est.set_index(['start_id', 'weekly_date'])
+
+                # Specify Outcome and Regressors
+                y = df_est[outcome]
+                X = add_constant(df_est[["interaction"]])
+
+                # Estimate Model
+                panel_model = PanelOLS(y, X, entity_effects=True, time_effects=True,
+                                       weights = df_est["weight"] if weights is not None else None)
+                result = panel_model.fit(cov_type='robust')
+                summary = result.summary
+
+                # View Estimation Results
+                print(summary)
+
+                # Save Estimation Results as LaTeX File
+                with open(filepath + f'output/regression_{model}_{outcome}{suffix}.tex', 'w') as f:
+                    f.write(result.summary.as_latex())
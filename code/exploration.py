@@ -0,0 +1,115 @@
+#%% Exploration: Ridership and Parallel Trends Figures
+# Libraries
+import pandas as pd
+
+from figures import render_figures
+from panel_store import panel_slice, aggregate_slice
+
+
+# Define Function for Plotting Ridership from Panel Store
+def exploration_figures(store, filepath = ""):
+    # 1. Average Daily Bixi Ridership Over Time
+    trip_count, _, dates = panel_slice(store, "trip_count")
+    monthly_trips, months = aggregate_slice(trip_count.sum(axis = 0), dates, "M")
+    df_plot = pd.DataFrame({"monthly_date": months.date,
+                            "trip_count": monthly_trips / 30.25})
+
+    figure_specs = [{"name": "average_daily_ridership",
+                     "kind": "bar",
+                     "data": df_plot,
+                     "x": "monthly_date",
+                     "y": "trip_count",
+                     "xtick_step": 12,
+                     "rotation": 45,
+                     "ylabel": "Average Daily Trips",
+                     "title": "Average Number of Daily Bixi Trips, Jan 2014 - July 2024"}]
+
+    # 2. Average Daily Bixi Trips per Day of Week in July 2024
+    trip_count, _, dates = panel_slice(store, "trip_count", start_date = "2024-07-01", end_date = "2024-07-31")
+    df_plot = pd.DataFrame({"start_date": pd.to_datetime(dates),
+                            "trip_count": trip_count.sum(axis = 0)})
+    df_plot["day_week"] = df_plot['start_date'].dt.day_name()
+    df_plot = df_plot.groupby("day_week")["trip_count"].mean().reset_index()
+    df_plot = df_plot.sort_values(by = "trip_count", ascending = False)
+
+    figure_specs.append({"name": "average_daily_ridership_dayofweek",
+                         "kind": "bar",
+                         "data": df_plot,
+                         "x": "day_week",
+                         "y": "trip_count",
+                         "ylabel": "Average Daily Trips",
+                         "title": "Average Number of Daily Bixi Trips per Day of Week, July 2024"})
+
+    # 3. Number of Bixi Stations Over Time
+    trip_count, _, dates = panel_slice(store, "trip_count")
+    active_stations, months = aggregate_slice(trip_count, dates, "M", how = "any")
+    df_plot = pd.DataFrame({"monthly_date": months.date,
+                            "start_id": active_stations.sum(axis = 0)})
+    df_plot = df_plot[df_plot["start_id"] > 0]
+
+    figure_specs.append({"name": "number_stations",
+                         "kind": "line",
+                         "data": df_plot,
+                         "x": "monthly_date",
+                         "y": "start_id",
+                         "ylim": [0,1000],
+                         "ylabel": "Number of Stations in Operation",
+                         "title": "Number of Stations in Operation, Jan 2014 - July 2024"})
+
+    # Render Figures
+    render_figures(figure_specs, filepath + "figures")
+
+
+# Define Function for Assessing Parallel Trends Assumption
+def did_plot(data, outcomes, filepath = ""):
+    # Create Event Time Variable
+    event_date = pd.to_datetime('2020-11-07')
+    monthly_date = pd.to_datetime(data["weekly_date"]).dt.to_period('M').dt.to_timestamp()
+    event_time = (monthly_date.dt.year - event_date.year) * 12 + (monthly_date.dt.month - event_date.month)
+
+    # Display Single Month Per Year
+    november = (monthly_date.dt.month == 11).to_numpy()
+    df_plot = data.loc[november, ["treated"] + outcomes].assign(event_time = event_time[november].to_numpy())
+
+    # Create Empty List for Plots
+    specs = []
+
+    # Iterate Over Outcomes
+    for outcome in outcomes:
+        # Select Parameters
+        if outcome == "trip_count_sa":
+            ylabel = "Average Number of Weekly Trips per Bixi Station"
+            title_label = "Number of Trips"
+        elif outcome == "trip_distance_sa":
+            ylabel = "Average Distance of Trip per Bixi Station (Kilometers)"
+            title_label = "Trip Distance"
+        elif outcome == "trip_duration_sa":
+            ylabel = "Average Duration of Trip per Bixi Station (Minutes)"
+            title_label = "Trip Duration"
+
+        # Express Outcome by Station
+        if outcome == "trip_count":
+            df_outcome = df_plot.groupby(["event_time", "treated"]).agg(
+                count_stations = ("treated", "count"),
+                **{f"{outcome}": (outcome, "sum")}
+                ).reset_index()
+            df_outcome[outcome] = df_outcome[outcome] / df_outcome["count_stations"]
+        else:
+            df_outcome = df_plot.groupby(["event_time", "treated"]).agg(
+                **{f"{outcome}": (outcome, "mean")}
+                ).reset_index()
+
+        # Specify Plot of Outcome in Event Time
+        specs.append({"name": f"did_{outcome}",
+                      "kind": "did",
+                      "data": df_outcome,
+                      "y": outcome,
+                      "xlim": [-62,62],
+                      "xlabel": "Event Time (Months since 2020-11)",
+                      "ylabel": ylabel,
+                      "title": f"Difference-in-Differences Plot in Event Time, {title_label}"})
+
+    # Render Plots and Combine Them
+    render_figures(specs,
+                   filepath + "figures",
+                   combined = {"did_combined": [spec["name"] for spec in specs]})
@@ -0,0 +1,134 @@
+#%% Figures: Parallel In-Memory Rendering of Exploration and Parallel Trends Plots
+# Libraries
+import os
+import io
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib as mpl
+import seaborn as sns
+import matplotlib.image as mpimg
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+
+# Figure Style, Applied in Each Worker Process, Starting from Seaborn's "ticks" Theme
+FIGURE_STYLE = {**sns.axes_style("ticks"),
+                "figure.figsize": (10,6),
+                "xtick.labelsize": 14,
+                "ytick.labelsize": 14,
+                "axes.labelsize": 18,
+                "legend.fontsize": 18,
+                "savefig.dpi": 300,
+                "font.family": "DejaVu Sans"}
+
+
+# Define Function for Hashing Figure Data and Parameters
+def figure_hash(spec):
+    digest = hashlib.sha1()
+    digest.update(pd.util.hash_pandas_object(spec["data"], index = False).values.tobytes())
+    digest.update(json.dumps({k: v for k, v in spec.items() if k != "data"}, sort_keys = True, default = str).encode())
+    return digest.hexdigest()
+
+
+# Define Function for Rendering Single Figure to PNG Bytes
+def render_figure(spec):
+    with mpl.rc_context(FIGURE_STYLE):
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        data = spec["data"]
+
+        # Bar Plot
+        if spec["kind"] == "bar":
+            positions = np.arange(len(data))
+            ax.bar(positions, data[spec["y"]], color = "blue")
+            step = spec.get("xtick_step", 1)
+            ax.set_xticks(positions[::step])
+            ax.set_xticklabels(data[spec["x"]].astype(str).iloc[::step], rotation = spec.get("rotation", 0))
+
+        # Line Plot
+        elif spec["kind"] == "line":
+            ax.plot(data[spec["x"]], data[spec["y"]], color = "blue")
+
+        # Difference-in-Differences Plot in Event Time
+        elif spec["kind"] == "did":
+            control_group = data[data["treated"] == 0]
+            treated_group = data[data["treated"] == 1]
+            ax.plot(control_group["event_time"], control_group[spec["y"]], marker = "o", linestyle = "-", color = "blue", label = "Control Group")
+            ax.plot(treated_group["event_time"], treated_group[spec["y"]], marker = "o", linestyle = "-", color = "red", label = "Treatment Group")
+            ax.axvline(x = 0, color = "gray", linestyle = "--")
+            ax.legend(loc = "upper left")
+
+        # Annotate Plot
+        ax.grid(False)
+        if "xlim" in spec:
+            ax.set_xlim(spec["xlim"])
+        if "ylim" in spec:
+            ax.set_ylim(spec["ylim"])
+        ax.set_xlabel(spec.get("xlabel", ""))
+        ax.set_ylabel(spec.get("ylabel", ""))
+        ax.set_title(spec.get("title", ""))
+
+        # Save Plot to Memory
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format = "png", bbox_inches = "tight")
+        return buffer.getvalue()
+
+
+# Define Function for Combining PNG Images Side by Side in Memory
+def compose_figures(images):
+    panels = [mpimg.imread(io.BytesIO(image), format = "png") for image in images]
+    max_height = max(panel.shape[0] for panel in panels)
+    panels = [np.pad(panel[:, :, :3], ((0, max_height - panel.shape[0]), (0, 0), (0, 0))) for panel in panels]
+    buffer = io.BytesIO()
+    mpimg.imsave(buffer, np.hstack(panels), format = "png")
+    return buffer.getvalue()
+
+
+# Define Function for Rendering Figures in Parallel, Skipping Unchanged Figures
+def render_figures(specs, path, combined = None, workers = None):
+    # Load Hashes of Previously Rendered Figures
+    manifest_path = os.path.join(path, ".figure_hashes.json")
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    # Identify Figures Whose Input Data Changed
+    hashes = {spec["name"]: figure_hash(spec) for spec in specs}
+    stale = [spec for spec in specs
+             if manifest.get(spec["name"]) != hashes[spec["name"]]
+             or not os.path.exists(os.path.join(path, f"{spec['name']}.png"))]
+
+    # Render Stale Figures in Process Pool
+    images = {}
+    if stale:
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            for spec, image in zip(stale, executor.map(render_figure, stale)):
+                images[spec["name"]] = image
+                with open(os.path.join(path, f"{spec['name']}.png"), "wb") as f:
+                    f.write(image)
+                manifest[spec["name"]] = hashes[spec["name"]]
+
+    # Compose Multi-Panel Figures
+    for name, panels in (combined or {}).items():
+        combined_hash = hashlib.sha1("".join(hashes[panel] for panel in panels).encode()).hexdigest()
+        if manifest.get(name) == combined_hash and os.path.exists(os.path.join(path, f"{name}.png")):
+            continue
+        for panel in panels:
+            if panel not in images:
+                with open(os.path.join(path, f"{panel}.png"), "rb") as f:
+                    images[panel] = f.read()
+        with open(os.path.join(path, f"{name}.png"), "wb") as f:
+            f.write(compose_figures([images[panel] for panel in panels]))
+        manifest[name] = combined_hash
+
+    # Save Hashes of Rendered Figures
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent = 2)
+
+    # Return Names of Re-Rendered Figures
+    return [spec["name"] for spec in stale]
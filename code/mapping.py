@@ -0,0 +1,242 @@
+#%% Mapping: Bixi Station Usage and REV Treatment Status Maps
+# Libraries
+import os
+import io
+import datetime as dt
+import pandas as pd
+from tqdm import tqdm
+import plotly.io as pio
+import plotly.express as px
+import plotly.graph_objects as go
+from PIL import Image
+from PIL import Image as PILImage
+from chart_studio.plotly import image as PlotlyImage
+pio.renderers.default = 'browser'
+
+
+# Define Function for Summarizing Usage by Bixi Station-Week
+def usage_table(data):
+    df_map = data.groupby(["start_id", "weekly_date"]).agg(
+        {"trip_count": "sum",
+         "trip_distance": "sum",
+         "start_lat": "mean",
+         "start_long": "mean",
+         "start_name": "first"}).reset_index()
+
+    df_map["weekly_date"] = pd.to_datetime(df_map["weekly_date"])
+    df_map['weekly_date_str'] = df_map['weekly_date'].dt.strftime('%Y-%m-%d')
+    df_map = df_map.sort_values(by = "weekly_date")
+    return df_map
+
+
+# Define Function for Specifying Map Parameters
+def map_parameters(data, animation_frame, title, size_max):
+    # Specify Map Parameters
+    fig = px.scatter_mapbox(data,
+                         lat = 'start_lat',
+                         lon = 'start_long',
+                         size = 'trip_count',
+                         color = "trip_distance",
+                         animation_frame = animation_frame,
+                         size_max = size_max,
+                         opacity = 0.75,
+                         hover_data = {"weekly_date_str": False,
+                                       "start_lat": False,
+                                       "start_long": False,
+                                       "start_name": True},
+                         labels = {"weekly_date_str": "Date",
+                                   "start_name": "Station Name",
+                                   "trip_count": "Total Number of Trips",
+                                   "trip_distance": "Total Distance Travelled (km)"},
+                         range_color = [0, 5000])
+
+    # Adjust Map Position
+    fig.update_layout(mapbox_style="open-street-map",
+                      mapbox = dict(
+                          center = go.layout.mapbox.Center(
+                              lat = 45.515,
+                              lon = -73.630),
+                          zoom = 10.5))
+
+    # Adjust Color Bar
+    fig.update_layout(coloraxis_colorbar=dict(
+        title = "Total Distance Travelled (km)",
+        tickvals = [0, 1000, 2000, 3000, 4000, 5000],
+        ticktext = ['0', '1000', '2000', '3000', '4000', '5000+'],
+        ))
+
+    # Add Title
+    fig.update_layout(
+        title = {
+            "text": title,
+            "font_size": 20,
+            "x": 0.50})
+
+    # Add Caption
+    fig.update_layout(
+        annotations = [dict(
+        x= 0.50,
+        y = -0.05,
+        font_size = 12,
+        showarrow = False,
+        text = "")])
+
+    # Adjust Map Size
+    fig.update_layout(
+        width = 1800,
+        height = 1000)
+
+    # Return Map
+    return fig
+
+
+# Define Function for Creating Map
+def map_station_usage(data, type, filepath = ""):
+    # Static Map
+    if type == "static":
+        pio.renderers.default = 'browser'
+        animation_frame = None
+        title = "Bixi Usage in Montreal, July 2024"
+        size_max = 20
+        data = data[data["weekly_date"].dt.date == dt.date(2024,7,29)]
+        fig = map_parameters(data, animation_frame, title, size_max)
+        fig.show()
+
+    # Animated Map
+    elif type == "animated":
+        pio.renderers.default = 'browser'
+        animation_frame = "weekly_date_str"
+        title = "Bixi Usage in Montreal, Jan 2014 - July 2024"
+        size_max = 20
+        fig = map_parameters(data, animation_frame, title, size_max)
+        fig.show()
+
+    # GIF Map
+    elif type == "gif":
+        images = []
+        pio.renderers.default = 'png'
+        animation_frame = None
+        size_max = 20
+
+        # Iterate Over Weeks
+        for date in tqdm(data["weekly_date"].unique().tolist()):
+            # Duplicate DataFrame
+            data_temp = data
+
+            # Select Date
+            date = pd.to_datetime(date).normalize()
+            data_temp = data_temp[data_temp["weekly_date"] == date]
+            date_str = date.strftime('%Y-%m-%d')
+            title = f"Bixi Usage in Montreal, {date_str}"
+            fig = map_parameters(data_temp, animation_frame, title, size_max)
+
+            # Save Map as Image
+            try:
+                img_bytes = PlotlyImage.get(fig)
+                image = PILImage.open(io.BytesIO(img_bytes))
+                image.save(filepath + "figures/images/image" + date_str + ".png")
+                images.append(image)
+            except:
+                break
+
+        # Create GIF from Images
+        image_files = [f for f in os.listdir(filepath + "figures/images") if f.endswith(('.png'))]
+        image_files.sort()
+        images = [Image.open(os.path.join(filepath + "figures/images", file)) for file in image_files]
+        images[0].save(filepath + "figures/gif_map.gif",
+                       save_all = True,
+                       append_images = images[1:],
+                       optimize = True,
+                       duration = 200,
+                       loop = 0)
+
+
+# Define Function for Summarizing Treatment Status by Bixi Station
+def treatment_status_table(data):
+    df_station_treatment_status = data.groupby(["start_id", "weekly_date"]).agg(
+        {"rev_distance": "first",
+         "treated": "first",
+         "post": "first",
+         "start_lat": "first",
+         "start_long": "first"}).reset_index()
+
+    df_station_treatment_status = df_station_treatment_status[df_station_treatment_status["weekly_date"].dt.date == dt.date(2024, 7, 29)]
+    return df_station_treatment_status
+
+
+# Define Function for Creating Map
+def map_rev_treated_control(data, filepath = ""):
+    # Extract Latitude and Longitude from LineString
+    data['lon'] = data.geometry.apply(lambda x: list(x.coords)[0][0])
+    data['lat'] = data.geometry.apply(lambda x: list(x.coords)[0][1])
+
+    # Create List of Points in All LineStrings
+    data['coords'] = data['geometry'].apply(lambda x: list(x.coords))
+
+    # Explode Coordinates
+    data = data.explode('coords')
+
+    # Separate Exploded Coordinates into Latitude and Longitude
+    data['lon'] = data['coords'].apply(lambda x: x[0])
+    data['lat'] = data['coords'].apply(lambda x: x[1])
+
+    # Merge in Treatment Status by Station
+    df_station_treatment_status = pd.read_excel(filepath + "data/bike_network/station_treatment_status.xlsx")
+
+    # Recode Treatment Status
+    df_station_treatment_status['treated'] = df_station_treatment_status['treated'].map(
+        {0: 'Control',
+         1: 'Treated'}).fillna("Other")
+    df_station_treatment_status = df_station_treatment_status.sort_values(by=['treated'], key=lambda x: x.map({'Treated': 0, 'Control': 1, 'Other': 2}))
+    color_map = {"Control": 'red',
+                 "Treated": 'green',
+                 "Other": "grey"}
+
+    # Plot REV Path
+    line_fig = px.line_mapbox(
+        data,
+        lon = 'lon',
+        lat = 'lat',
+        mapbox_style = "open-street-map",
+        line_group = data.index,  # Ensure lines are grouped by the original geometry
+    )
+
+    # Adjust Line Color
+    line_fig.update_traces(line=dict(color='black'))
+
+    # Plot Bike Rental Stations
+    scatter_fig = px.scatter_mapbox(
+        df_station_treatment_status,
+        lon = 'start_long',
+        lat = 'start_lat',
+        color = "treated",
+        color_discrete_map = color_map,
+        mapbox_style = "open-street-map",
+    )
+
+    # Adjust Scatter Size
+    scatter_fig.update_traces(marker=dict(size=10))
+
+    # Combine Line and Scatter Plots
+    for trace in scatter_fig.data:
+        line_fig.add_trace(trace)
+
+    # Adjust Map Size
+    line_fig.update_layout(
+        width = 1800,
+        height = 1000)
+
+    # Adjust Map Position
+    line_fig.update_layout(mapbox = dict(
+                              center = go.layout.mapbox.Center(
+                                  lat = 45.540,
+                                  lon = -73.630),
+                              zoom = 12.5))
+
+    # Add Legend Title
+    line_fig.update_layout(
+        legend_title_text = 'Treatment Status'
+    )
+
+    # Show Map
+    line_fig.show()
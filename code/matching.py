@@ -0,0 +1,94 @@
+#%% Matching: Nearest-Neighbour Selection of Control Bixi Stations
+# Libraries
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+
+# Define Function for Gathering Pre-Treatment Covariates by Bixi Station
+def station_covariates(data, treatment_date = "2020-11-07", outcome = "trip_count"):
+    # Retain Pre-Treatment Weeks in Which Station Was Active
+    df_pre = data[(pd.to_datetime(data["weekly_date"]) < pd.Timestamp(treatment_date)) & (data[outcome] > 0)]
+
+    # Average Covariates by Station
+    df_covariates = df_pre.groupby("start_id").agg(
+        treated = ("treated", "first"),
+        pre_ridership = (outcome, "mean"),
+        cbd_distance = ("cbd_distance", "mean"),
+        neighbours_500m = ("neighbours_500m", "mean")).reset_index()
+
+    # Return Covariates for Treated and Control Stations
+    return df_covariates.dropna()
+
+
+# Define Function for Building Search Tree over Standardized Control Covariates
+def build_matcher(covariates, columns = ["pre_ridership", "cbd_distance", "neighbours_500m"]):
+    # Standardize Covariates Using Pooled Moments
+    X = covariates[columns].to_numpy(dtype = np.float64)
+    mean = X.mean(axis = 0)
+    std = X.std(axis = 0)
+    std[std == 0] = 1
+    Z = (X - mean) / std
+
+    # Split Treated and Control Stations
+    is_treated = covariates["treated"].to_numpy() == 1
+    is_control = covariates["treated"].to_numpy() == 0
+
+    # Return Matcher, Built Once and Reused Across Re-Matching
+    return {"tree": cKDTree(Z[is_control]),
+            "control_ids": covariates["start_id"].to_numpy()[is_control],
+            "treated_ids": covariates["start_id"].to_numpy()[is_treated],
+            "treated_Z": Z[is_treated]}
+
+
+# Define Function for Matching Treated Stations to Nearest Control Stations
+def match_controls(matcher, k = 1, caliper = None, replace = True, treated_idx = None):
+    # Select Treated Stations (e.g. a Bootstrap Resample)
+    if treated_idx is None:
+        treated_idx = np.arange(len(matcher["treated_ids"]))
+    Z = matcher["treated_Z"][treated_idx]
+    n_controls = len(matcher["control_ids"])
+
+    # Query All Treated Stations in One Bulk Call
+    k_query = min(k if replace else k * 4, n_controls)
+    bound = np.inf if caliper is None else caliper
+    distances, neighbours = matcher["tree"].query(Z, k = k_query, distance_upper_bound = bound)
+    distances = distances.reshape(len(Z), k_query)
+    neighbours = neighbours.reshape(len(Z), k_query)
+
+    # With Replacement, Keep k Nearest Controls Within Caliper
+    if replace:
+        rows, cols = np.nonzero(np.isfinite(distances[:, :k]))
+        pairs = np.column_stack([rows, neighbours[rows, cols]])
+
+    # Without Replacement, Assign Candidate Pairs Greedily by Distance
+    else:
+        rows, cols = np.nonzero(np.isfinite(distances))
+        order = np.argsort(distances[rows, cols], kind = "stable")
+        used = np.zeros(n_controls, dtype = bool)
+        counts = np.zeros(len(Z), dtype = int)
+        pairs = []
+        for row, control in zip(rows[order], neighbours[rows, cols][order]):
+            if not used[control] and counts[row] < k:
+                used[control] = True
+                counts[row] += 1
+                pairs.append((row, control))
+        pairs = np.array(pairs, dtype = int).reshape(-1, 2)
+
+    # Matched Sample Must Contain at Least One Pair
+    if len(pairs) == 0:
+        raise ValueError(f"No control station within caliper {caliper} of any treated station")
+
+    # Weight Each Control by Share of Treated Station It Stands In For
+    matches_per_treated = np.bincount(pairs[:, 0], minlength = len(Z))
+    control_weight = np.bincount(pairs[:, 1],
+                                 weights = 1 / matches_per_treated[pairs[:, 0]],
+                                 minlength = n_controls)
+    treated_weight = np.bincount(treated_idx[np.unique(pairs[:, 0])],
+                                 minlength = len(matcher["treated_ids"])).astype(np.float64)
+
+    # Return Matched Sample and Weights
+    df_weights = pd.concat([
+        pd.DataFrame({"start_id": matcher["treated_ids"], "weight": treated_weight}),
+        pd.DataFrame({"start_id": matcher["control_ids"], "weight": control_weight})])
+    return df_weights[df_weights["weight"] > 0].reset_index(drop = True)
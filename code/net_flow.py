@@ -0,0 +1,84 @@
+#%% Net Flow: Station Arrivals, Departures, and Dock Imbalance
+# Libraries
+import numpy as np
+import pandas as pd
+
+
+# Length of Time Buckets in Nanoseconds
+BUCKET_NS = {"h": 3600 * 10**9,
+             "D": 86400 * 10**9}
+
+
+# Define Function for Collapsing Event Codes into Cell Counts
+def count_cells(codes, signs):
+    cells, inverse = np.unique(codes, return_inverse = True)
+    arrivals = np.bincount(inverse, weights = signs > 0, minlength = len(cells))
+    departures = np.bincount(inverse, weights = signs < 0, minlength = len(cells))
+    return cells, arrivals, departures
+
+
+# Define Function for Merging Partial Cell Counts
+def merge_cells(partials):
+    cells = np.concatenate([p[0] for p in partials])
+    merged, inverse = np.unique(cells, return_inverse = True)
+    arrivals = np.bincount(inverse, weights = np.concatenate([p[1] for p in partials]), minlength = len(merged))
+    departures = np.bincount(inverse, weights = np.concatenate([p[2] for p in partials]), minlength = len(merged))
+    return merged, arrivals, departures
+
+
+# Define Function for Computing Station Net Flow Panel from Start and End Events
+def net_flow_panel(data, freq = "h", chunk_size = 5_000_000, max_cells = 20_000_000):
+    # Locate Time Buckets Relative to First Midnight
+    bucket_ns = BUCKET_NS[freq]
+    origin = pd.Timestamp(data["start_date"].min()).normalize().value
+    n_buckets = (pd.Timestamp(data["end_date"].max()).value - origin) // bucket_ns + 1
+
+    # Partition Stations So Each Partition Has at Most max_cells Possible Station-Period Cells;
+    # a Single Station Spanning More Periods than max_cells Forms Its Own Partition
+    station_ids = np.unique(np.concatenate([data[f"{type}_id"].dropna().to_numpy().astype("int64") for type in ["start", "end"]]))
+    per_partition = max(1, max_cells // n_buckets)
+    partitions = [(block[0], block[-1]) for block in np.array_split(station_ids, max(1, -(-len(station_ids) // per_partition))) if len(block)]
+
+    # Process Each Station Partition to Completion Before Starting Next
+    panels = []
+    for first_id, last_id in partitions:
+        # Accumulate Event Counts Chunk by Chunk, Merging Pending Counts Once They Exceed Budget
+        compacted, pending = [], []
+        for start in range(0, len(data), chunk_size):
+            chunk = data.iloc[start:start + chunk_size]
+            codes, signs = [], []
+            # Departures Enter with Negative Sign, Arrivals with Positive Sign
+            for type, sign in [("start", -1), ("end", 1)]:
+                ids = chunk[f"{type}_id"].to_numpy(dtype = np.float64, na_value = np.nan)
+                valid = (ids >= first_id) & (ids <= last_id) & chunk[f"{type}_date"].notna().to_numpy()
+                ids = ids[valid].astype("int64")
+                times = chunk[f"{type}_date"].to_numpy()[valid].astype("datetime64[ns]").astype("int64")
+                codes.append(ids * n_buckets + (times - origin) // bucket_ns)
+                signs.append(np.full(len(ids), sign, dtype = np.int8))
+            pending.append(count_cells(np.concatenate(codes), np.concatenate(signs)))
+            if sum(len(p[0]) for p in pending) > max_cells:
+                compacted, pending = [merge_cells(compacted + pending)], []
+        if not compacted and not pending:
+            continue
+
+        # Merge into Single Stream Sorted by Station, Then Time
+        cells, arrivals, departures = merge_cells(compacted + pending)
+        station_id = cells // n_buckets
+        bucket = cells % n_buckets
+
+        # Running Cumulative Imbalance Within Station, Using Segmented Cumulative Sum
+        net_flow = arrivals - departures
+        cum_flow = np.cumsum(net_flow)
+        first = np.r_[True, station_id[1:] != station_id[:-1]]
+        offset = np.repeat((cum_flow - net_flow)[first], np.diff(np.r_[np.flatnonzero(first), len(cells)]))
+
+        # Panel of Non-Empty Station-Period Cells in Partition
+        panels.append(pd.DataFrame({"station_id": station_id,
+                                    "period": pd.to_datetime(origin + bucket * bucket_ns),
+                                    "departures": departures.astype("int32"),
+                                    "arrivals": arrivals.astype("int32"),
+                                    "net_flow": net_flow.astype("int32"),
+                                    "cum_imbalance": (cum_flow - offset).astype("int32")}))
+
+    # Return Panel, Sorted by Station, Then Time
+    return pd.concat(panels, ignore_index = True)
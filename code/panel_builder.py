@@ -0,0 +1,153 @@
+#%% Panel Builder: Sparse Station Panels at Hourly, Daily, or Weekly Grain
+# Libraries
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+# Length of Time Buckets in Nanoseconds
+GRAIN_NS = {"hour": 3600 * 10**9,
+            "day": 86400 * 10**9,
+            "week": 7 * 86400 * 10**9}
+
+
+# Define Function for Building Sparse Station Panel at Given Grain
+def build_panel(data, grain = "day", outcomes = ["trip_count", "trip_distance", "trip_duration"],
+                time_col = "start_date", station_col = "start_id", start = None, end = None):
+    # Anchor Buckets at Midnight, on a Monday for Weekly Grain
+    bucket_ns = GRAIN_NS[grain]
+    origin = pd.Timestamp(start if start is not None else data[time_col].min()).normalize()
+    if grain == "week":
+        origin = origin - pd.Timedelta(days = origin.weekday())
+    last = pd.Timestamp(end if end is not None else data[time_col].max())
+    n_buckets = (last.value - origin.value) // bucket_ns + 1
+
+    # Assign Integer Bucket Codes to Trips
+    times = data[time_col].to_numpy().astype("datetime64[ns]").astype("int64")
+    valid = data[station_col].notna().to_numpy() & (times >= origin.value) & (times <= last.value)
+    stations, station_idx = np.unique(data[station_col].to_numpy()[valid].astype("int64"), return_inverse = True)
+    codes = station_idx.astype("int64") * n_buckets + (times[valid] - origin.value) // bucket_ns
+
+    # Aggregate Trips into Non-Empty Cells Only
+    cells, inverse = np.unique(codes, return_inverse = True)
+    values = {outcome: np.bincount(inverse,
+                                   weights = data[outcome].to_numpy(dtype = np.float64)[valid],
+                                   minlength = len(cells)).astype(np.float32)
+              for outcome in outcomes}
+
+    # Return Sparse Panel; Cells Not Stored Are Zero
+    return {"grain": grain,
+            "origin": origin,
+            "n_buckets": int(n_buckets),
+            "stations": stations,
+            "station_idx": (cells // n_buckets).astype("int32"),
+            "bucket": (cells % n_buckets).astype("int32"),
+            "values": values}
+
+
+# Define Function for Saving Sparse Panel to Compressed Archive
+def save_panel(panel, path):
+    np.savez_compressed(path,
+                        grain = panel["grain"],
+                        origin = panel["origin"].value,
+                        n_buckets = panel["n_buckets"],
+                        stations = panel["stations"],
+                        station_idx = panel["station_idx"],
+                        bucket = panel["bucket"],
+                        outcomes = np.array(list(panel["values"])),
+                        **{f"value_{outcome}": values for outcome, values in panel["values"].items()})
+
+
+# Define Function for Loading Sparse Panel from Compressed Archive
+def load_panel(path):
+    archive = np.load(path)
+    return {"grain": str(archive["grain"]),
+            "origin": pd.Timestamp(int(archive["origin"])),
+            "n_buckets": int(archive["n_buckets"]),
+            "stations": archive["stations"],
+            "station_idx": archive["station_idx"],
+            "bucket": archive["bucket"],
+            "values": {str(outcome): archive[f"value_{outcome}"] for outcome in archive["outcomes"]}}
+
+
+# Define Function for Converting Bucket Codes to Timestamps
+def bucket_periods(panel, buckets):
+    return panel["origin"] + pd.to_timedelta(np.asarray(buckets, dtype = "int64") * GRAIN_NS[panel["grain"]], unit = "ns")
+
+
+# Define Function for Creating Long DataFrame of Non-Empty Cells
+def panel_frame(panel):
+    df_panel = pd.DataFrame({"start_id": panel["stations"][panel["station_idx"]],
+                             "period": bucket_periods(panel, panel["bucket"])})
+    for outcome, values in panel["values"].items():
+        df_panel[outcome] = values
+    return df_panel
+
+
+# Define Function for Materializing Dense View of Selected Stations and Periods
+def dense_view(panel, outcome, stations = None, start = None, end = None):
+    # Select Buckets in Date Range
+    bucket_ns = GRAIN_NS[panel["grain"]]
+    lo = 0 if start is None else max(0, (pd.Timestamp(start).value - panel["origin"].value) // bucket_ns)
+    hi = panel["n_buckets"] if end is None else min(panel["n_buckets"], (pd.Timestamp(end).value - panel["origin"].value) // bucket_ns + 1)
+
+    # Select Stations
+    rows = np.arange(len(panel["stations"]))
+    if stations is not None:
+        stations = np.asarray(stations, dtype = "int64")
+        rows = np.minimum(np.searchsorted(panel["stations"], stations), len(panel["stations"]) - 1)
+        missing = panel["stations"][rows] != stations
+        if missing.any():
+            raise KeyError(f"Stations not in panel: {stations[missing].tolist()}")
+
+    # Densify Only Requested Block
+    matrix = sparse.csr_matrix((panel["values"][outcome], (panel["station_idx"], panel["bucket"])),
+                               shape = (len(panel["stations"]), panel["n_buckets"]))
+    return matrix[rows][:, lo:hi].toarray(), panel["stations"][rows], bucket_periods(panel, np.arange(lo, hi))
+
+
+# Define Function for Estimating Two-Way Fixed Effects DiD on Sparse Panel
+def sparse_twfe(panel, outcome, treated, treatment_date, hour = None):
+    # Retain Treated and Control Stations
+    status = treated.set_index("start_id")["treated"].reindex(panel["stations"]).to_numpy()
+    station_keep = np.isin(status, [0, 1])
+    T = status[station_keep].astype(np.float64)
+    station_pos = np.cumsum(station_keep) - 1
+
+    # Retain Periods, Optionally for a Single Hour of Day
+    buckets = np.arange(panel["n_buckets"])
+    if hour is not None:
+        buckets = buckets[bucket_periods(panel, buckets).hour == hour]
+    bucket_keep = np.zeros(panel["n_buckets"], dtype = bool)
+    bucket_keep[buckets] = True
+    post = np.asarray(bucket_periods(panel, buckets) >= pd.Timestamp(treatment_date), dtype = np.float64)
+    bucket_pos = np.cumsum(bucket_keep) - 1
+
+    # Retain Non-Empty Cells in Balanced Panel of Kept Stations and Periods
+    keep = station_keep[panel["station_idx"]] & bucket_keep[panel["bucket"]]
+    i = station_pos[panel["station_idx"][keep]]
+    t = bucket_pos[panel["bucket"][keep]]
+    y = panel["values"][outcome][keep].astype(np.float64)
+    n, m = len(T), len(buckets)
+
+    # Demeaned Treatment Is Product of Demeaned Station and Period Indicators
+    T_dm = T - T.mean()
+    post_dm = post - post.mean()
+    sum_d2 = (T_dm**2).sum() * (post_dm**2).sum()
+
+    # Coefficient Uses Only Non-Empty Cells, Since Empty Cells Are Zero
+    beta = (T_dm[i] * post_dm[t] * y).sum() / sum_d2
+
+    # Station-Clustered Standard Error from Station Scores
+    period_mean = np.bincount(t, weights = y, minlength = m) / n
+    c = (post_dm * period_mean).sum()
+    score = np.bincount(i, weights = T_dm[i] * post_dm[t] * y, minlength = n) - T_dm * c - beta * T_dm**2 * (post_dm**2).sum()
+    se = np.sqrt((score**2).sum()) / sum_d2
+
+    # Return Estimates
+    return {"outcome": outcome,
+            "hour": hour,
+            "coef": float(beta),
+            "std_err": float(se),
+            "n_stations": n,
+            "n_periods": m}
@@ -0,0 +1,145 @@
+#%% Panel Store: Memory-Mapped Station x Day x Outcome Array
+# Libraries
+import os
+import json
+import numpy as np
+import pandas as pd
+
+
+# Define Function for Writing Station-Day Outcomes to Memory-Mapped Panel Store
+def write_panel_store(data, path, outcomes, start = None, end = None, date_col = "start_date", station_col = "start_id"):
+    # Create Store Directory
+    os.makedirs(path, exist_ok = True)
+
+    # Build Sidecar Index Arrays for Stations and Every Day from Start to End, Including Days Without Trips
+    data = data[data[station_col].notna()]
+    stations = np.sort(data[station_col].unique()).astype("int64")
+    days = pd.to_datetime(data[date_col]).values.astype("datetime64[D]")
+    first = days.min() if start is None else np.datetime64(start, "D")
+    last = days.max() if end is None else np.datetime64(end, "D")
+    dates = np.arange(first, last + np.timedelta64(1, "D"), dtype = "datetime64[D]")
+
+    # Drop Trips Outside Date Range
+    in_range = (days >= dates[0]) & (days <= dates[-1])
+    data, days = data[in_range], days[in_range]
+
+    # Locate Each Row in Panel
+    station_idx = np.searchsorted(stations, data[station_col].to_numpy().astype("int64"))
+    day_idx = (days - dates[0]).astype("int64")
+    cell = station_idx * len(dates) + day_idx
+
+    # Write Outcomes as Float32 Memory Map (Stations x Days x Outcomes)
+    panel = np.lib.format.open_memmap(os.path.join(path, "panel.npy"),
+                                      mode = "w+",
+                                      dtype = np.float32,
+                                      shape = (len(stations), len(dates), len(outcomes)))
+    for k, outcome in enumerate(outcomes):
+        # Outcomes Are Stored as Station-Day Sums
+        weights = data[outcome].fillna(0).to_numpy(dtype = np.float64)
+        totals = np.bincount(cell, weights = weights, minlength = panel.shape[0] * panel.shape[1])
+        panel[:, :, k] = totals.reshape(panel.shape[0], panel.shape[1])
+    panel.flush()
+    del panel
+
+    # Save Sidecar Index Arrays
+    np.save(os.path.join(path, "stations.npy"), stations)
+    np.save(os.path.join(path, "dates.npy"), dates)
+    with open(os.path.join(path, "outcomes.json"), "w") as f:
+        json.dump(list(outcomes), f)
+
+    # Return Read-Only Store
+    return open_panel_store(path)
+
+
+# Define Function for Opening Panel Store Without Loading It Into Memory
+def open_panel_store(path):
+    with open(os.path.join(path, "outcomes.json")) as f:
+        outcomes = json.load(f)
+    return {"panel": np.load(os.path.join(path, "panel.npy"), mmap_mode = "r"),
+            "stations": np.load(os.path.join(path, "stations.npy")),
+            "dates": np.load(os.path.join(path, "dates.npy")),
+            "outcomes": outcomes}
+
+
+# Define Function for Slicing Panel Store by Outcome, Station, and Date
+def panel_slice(store, outcome, stations = None, start_date = None, end_date = None):
+    # Select Date Range (Contiguous, Therefore Zero-Copy)
+    dates = store["dates"]
+    lo = 0 if start_date is None else np.searchsorted(dates, np.datetime64(start_date, "D"), side = "left")
+    hi = len(dates) if end_date is None else np.searchsorted(dates, np.datetime64(end_date, "D"), side = "right")
+    k = store["outcomes"].index(outcome)
+    view = store["panel"][:, lo:hi, k]
+
+    # Select Stations (Only Arbitrary Station Sets Require a Copy of the Subset)
+    station_ids = store["stations"]
+    if stations is not None:
+        stations = np.asarray(stations, dtype = "int64")
+        rows = np.minimum(np.searchsorted(station_ids, stations), len(station_ids) - 1)
+        missing = station_ids[rows] != stations
+        if missing.any():
+            raise KeyError(f"Stations not in panel store: {stations[missing].tolist()}")
+        view = view[rows]
+        station_ids = station_ids[rows]
+
+    # Return Slice with Its Index Arrays
+    return view, station_ids, dates[lo:hi]
+
+
+# Define Function for Locating Period Boundaries Along Day Axis
+def period_bounds(dates, freq):
+    dates = pd.DatetimeIndex(dates)
+    if freq == "W":
+        keys = dates - pd.to_timedelta(dates.weekday, unit = "D")
+    elif freq == "M":
+        keys = dates.to_period("M").to_timestamp()
+    else:
+        raise ValueError(f"Unsupported frequency: {freq}")
+    if len(keys) == 0:
+        return np.array([], dtype = int), keys
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return starts, keys[starts]
+
+
+# Define Function for Aggregating Panel Slice to Weekly or Monthly Frequency
+def aggregate_slice(view, dates, freq, how = "sum"):
+    starts, periods = period_bounds(dates, freq)
+    # Empty Date Range Has No Periods
+    if len(starts) == 0:
+        return np.zeros(np.shape(view)[:-1] + (0,), dtype = np.float64 if how == "sum" else bool), periods
+    if how == "sum":
+        return np.add.reduceat(view, starts, axis = -1, dtype = np.float64), periods
+    elif how == "any":
+        return np.logical_or.reduceat(view > 0, starts, axis = -1), periods
+    raise ValueError(f"Unsupported aggregation: {how}")
+
+
+# Define Function for Creating Station-Week Outcomes from Panel Store
+def weekly_outcomes(store, stations = None, totals = False):
+    # Weekly Sums of Daily Outcomes
+    counts, periods = aggregate_slice(panel_slice(store, "trip_count")[0], store["dates"], "W")
+    distances, _ = aggregate_slice(panel_slice(store, "trip_distance")[0], store["dates"], "W")
+    durations, _ = aggregate_slice(panel_slice(store, "trip_duration")[0], store["dates"], "W")
+
+    # Days Without Trips Enter Weekly Means as a Single Zero Observation
+    rows, _ = aggregate_slice(np.maximum(panel_slice(store, "trip_count")[0], 1), store["dates"], "W")
+    if totals:
+        rows = np.ones_like(rows)
+
+    # Long DataFrame
+    n_stations, n_weeks = counts.shape
+    df_weekly = pd.DataFrame({"start_id": np.repeat(store["stations"], n_weeks),
+                              "weekly_date": np.tile(periods.values, n_stations),
+                              "trip_count": counts.ravel(),
+                              "trip_distance": (distances / rows).ravel(),
+                              "trip_duration": (durations / rows).ravel()})
+
+    # Attach Station Attributes of Each Week's Year, Carried into Years Without Trips from Nearest Year with Trips
+    if stations is not None:
+        index = pd.MultiIndex.from_product([store["stations"], np.unique(periods.year)], names = ["start_id", "year"])
+        df_years = stations.set_index(["start_id", "year"]).reindex(index)
+        df_years = df_years.groupby(level = "start_id").ffill().groupby(level = "start_id").bfill().reset_index()
+        df_weekly["year"] = pd.DatetimeIndex(df_weekly["weekly_date"]).year
+        df_weekly = pd.merge(df_weekly, df_years, on = ["start_id", "year"], how = "left").drop(columns = "year")
+
+    # Return Station-Week Outcomes
+    return df_weekly
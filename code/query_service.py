@@ -0,0 +1,174 @@
+#%% Query Service: Local HTTP/JSON Queries over Station Panel
+# Libraries
+import os
+import json
+import time
+import argparse
+import threading
+from collections import OrderedDict, deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+import pandas as pd
+
+from panel_store import open_panel_store, panel_slice, aggregate_slice
+
+
+# Define Class for Least-Recently-Used Cache with Byte-Size Eviction
+class ResultCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self.lock:
+            if len(value) > self.max_bytes:
+                return
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key))
+            self.entries[key] = value
+            self.size += len(value)
+            # Evict Least Recently Used Results Until Under Budget
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last = False)
+                self.size -= len(evicted)
+
+
+# Define Function for Answering Filtered, Grouped Query
+def run_query(store, df_treated, params):
+    # Parse Query Parameters
+    outcome = params.get("outcome", "trip_count")
+    grain = params.get("grain", "day")
+    group_by = params.get("group_by")
+    stations = params.get("stations")
+    if stations is not None:
+        stations = np.array([int(s) for s in stations.split(",") if s], dtype = "int64")
+        stations = stations[np.isin(stations, store["stations"])]
+
+    # Slice Panel by Outcome, Stations, and Date Range
+    view, station_ids, dates = panel_slice(store, outcome, stations, params.get("start"), params.get("end"))
+
+    # Filter by Treatment Status
+    status = df_treated.set_index("start_id")["treated"].reindex(station_ids).to_numpy()
+    if "treated" in params:
+        keep = status == int(params["treated"])
+        view, station_ids, status = view[keep], station_ids[keep], status[keep]
+
+    # Aggregate to Requested Grain
+    if grain == "day":
+        values, periods = np.asarray(view, dtype = np.float64), pd.DatetimeIndex(dates)
+    elif grain in ["week", "month"]:
+        values, periods = aggregate_slice(view, dates, {"week": "W", "month": "M"}[grain])
+    else:
+        raise ValueError(f"Unsupported grain: {grain}")
+    periods = periods.strftime("%Y-%m-%d").tolist()
+
+    # Group Results
+    if group_by == "station":
+        groups = {str(s): values[i] for i, s in enumerate(station_ids)}
+    elif group_by == "treated":
+        labels = pd.Series(status).map({0: "control", 1: "treated"}).fillna("other").to_numpy()
+        groups = {label: values[labels == label].sum(axis = 0) for label in np.unique(labels)}
+    elif group_by is None:
+        groups = {"all": values.sum(axis = 0)}
+    else:
+        raise ValueError(f"Unsupported grouping: {group_by}")
+
+    # Return Results
+    return {"outcome": outcome,
+            "grain": grain,
+            "n_stations": int(len(station_ids)),
+            "periods": periods,
+            "groups": {k: v.round(4).tolist() for k, v in groups.items()}}
+
+
+# Define Function for Creating Request Handler Bound to Loaded Panel
+def make_handler(store, df_treated, cache, latencies):
+    # Latencies Are Appended and Read by Concurrent Request Threads
+    latency_lock = threading.Lock()
+
+    class QueryHandler(BaseHTTPRequestHandler):
+        def send_json(self, status, body):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+
+            # Latency and Cache Metrics
+            if url.path == "/metrics":
+                with latency_lock:
+                    observed = np.array(list(latencies), dtype = np.float64)
+                metrics = {"requests": int(len(observed)),
+                           "p50_ms": float(np.percentile(observed, 50)) if len(observed) else None,
+                           "p99_ms": float(np.percentile(observed, 99)) if len(observed) else None,
+                           "cache_hits": cache.hits,
+                           "cache_misses": cache.misses,
+                           "cache_bytes": cache.size,
+                           "cache_entries": len(cache.entries)}
+                self.send_json(200, json.dumps(metrics).encode())
+                return
+
+            # Panel Queries
+            if url.path != "/query":
+                self.send_json(404, json.dumps({"error": "Unknown endpoint"}).encode())
+                return
+            start = time.perf_counter()
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            key = json.dumps(params, sort_keys = True)
+            body = cache.get(key)
+            status = 200
+            if body is None:
+                try:
+                    body = json.dumps(run_query(store, df_treated, params)).encode()
+                    cache.put(key, body)
+                except Exception as e:
+                    # Any Failed Query Is Reported to Client Rather than Dropping Connection
+                    status, body = 400, json.dumps({"error": f"{type(e).__name__}: {e}"}).encode()
+            with latency_lock:
+                latencies.append((time.perf_counter() - start) * 1000)
+            self.send_json(status, body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return QueryHandler
+
+
+# Define Function for Serving Queries
+def serve(store_path, host = "127.0.0.1", port = 8050, cache_bytes = 256 * 1024**2):
+    # Load Panel and Treatment Table Once
+    store = open_panel_store(store_path)
+    df_treated = pd.read_csv(os.path.join(store_path, "treated.csv"))
+
+    # Start Server
+    handler = make_handler(store, df_treated, ResultCache(cache_bytes), deque(maxlen = 10000))
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Serving station panel queries on http://{host}:{port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Serve queries over the station-day panel store.")
+    parser.add_argument("--store", default = "data/panel")
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = 8050)
+    parser.add_argument("--cache-mb", type = int, default = 256)
+    args = parser.parse_args()
+    serve(args.store, args.host, args.port, args.cache_mb * 1024**2)
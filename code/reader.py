@@ -0,0 +1,99 @@
+#%% Reader: Schema-Aware Reading of Bixi Trip Files
+# Libraries
+import datetime as dt
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.compute as pc
+
+
+# Map Raw Column Names to Variables Used in Analysis
+COLUMN_MAP = {"start_date": "start_date",
+              "end_date": "end_date",
+              "start_station_code": "start_station_code",
+              "end_station_code": "end_station_code",
+              "start_name": "start_name",
+              "end_name": "end_name",
+              "STARTSTATIONNAME": "start_name",
+              "ENDSTATIONNAME": "end_name",
+              "STARTTIMEMS": "start_date",
+              "ENDTIMEMS": "end_date"}
+
+# Candidate Fixed Timestamp Formats
+DATE_FORMATS = ["%Y-%m-%d %H:%M:%S",
+                "%Y-%m-%d %H:%M",
+                "%Y-%m-%dT%H:%M:%S",
+                "%Y-%m-%d %H:%M:%S.%f"]
+
+
+# Define Function for Sniffing Header and First Row of Trip File
+def sniff_schema(file):
+    # Read Header and First Row Only
+    sample = pd.read_csv(file, nrows = 1, dtype = str)
+
+    # Retain Needed Columns
+    columns = {raw: COLUMN_MAP[raw] for raw in sample.columns if raw in COLUMN_MAP}
+
+    # Identify Timestamp Encoding
+    dates = {}
+    for raw, col in columns.items():
+        if col not in ["start_date", "end_date"]:
+            continue
+        if raw.endswith("MS"):
+            dates[raw] = "epoch_ms"
+            continue
+        value = sample[raw].iloc[0] if len(sample) else ""
+        dates[raw] = None
+        for date_format in DATE_FORMATS:
+            try:
+                dt.datetime.strptime(str(value), date_format)
+                dates[raw] = date_format
+                break
+            except ValueError:
+                pass
+
+    # Return Schema
+    return {"columns": columns, "dates": dates}
+
+
+# Define Function for Reading Trip File with Column Projection and Typed Dates
+def read_trips(file, schema = None):
+    # Sniff Schema
+    if schema is None:
+        schema = sniff_schema(file)
+    columns, dates = schema["columns"], schema["dates"]
+
+    # Specify Column Types
+    column_types = {}
+    for raw, col in columns.items():
+        if col in ["start_name", "end_name"]:
+            column_types[raw] = pa.dictionary(pa.int32(), pa.string())
+        elif dates.get(raw) == "epoch_ms":
+            column_types[raw] = pa.string()
+        elif dates.get(raw) is not None:
+            column_types[raw] = pa.timestamp("ns")
+    date_formats = [f for f in set(dates.values()) if f not in [None, "epoch_ms"]]
+
+    # Read Only Needed Columns, Parsing Fixed-Format Timestamps During Read
+    table = pv.read_csv(file,
+                        convert_options = pv.ConvertOptions(include_columns = list(columns),
+                                                            column_types = column_types,
+                                                            timestamp_parsers = date_formats + [pv.ISO8601]))
+
+    # Convert Epoch Milliseconds to Nanosecond Timestamps, Leaving Non-Numeric Values Missing
+    for raw in [raw for raw, kind in dates.items() if kind == "epoch_ms"]:
+        # Integer, Decimal, and Exponent Forms Are Parsed as Floats, then Rounded to Whole Milliseconds
+        is_numeric = pc.fill_null(pc.match_substring_regex(table[raw], r"^\s*[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?\s*$"), False)
+        ms = pc.cast(pc.if_else(is_numeric, pc.utf8_trim_whitespace(table[raw]), None), pa.float64())
+        ms = pc.cast(pc.round(ms), pa.int64())
+        ns = pc.multiply(ms, 1_000_000).cast(pa.timestamp("ns"))
+        table = table.set_column(table.schema.get_field_index(raw), raw, ns)
+
+    # Convert to DataFrame and Rename Variables
+    df = table.to_pandas().rename(columns = columns)
+    for date in ["start_date", "end_date"]:
+        if date in df.columns and not pd.api.types.is_datetime64_any_dtype(df[date]):
+            df[date] = pd.to_datetime(df[date], format = "ISO8601")
+
+    # Return DataFrame
+    return df
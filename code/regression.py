@@ -0,0 +1,79 @@
+#%% Regression: Preparing Weekly Station Panel for Econometric Analysis
+# Libraries
+import pandas as pd
+from statsmodels.tsa.seasonal import seasonal_decompose
+
+from spatial_features import station_year_table, spatial_features, broadcast_features
+
+
+# Define Function for Preparing Dataset for Regressions
+def prepare_regressions(data, flows = None, filepath = ""):
+    # Select Relevant Variables from Station-Week Panel
+    df_regression = data[["start_id", "weekly_date", "rev_distance", "treated", "post", "start_lat", "start_long",
+                          "trip_count", "trip_distance", "trip_duration"]].copy()
+
+    # Gather Weekly Arrivals and Net Flow
+    outcomes = ["trip_count", "trip_distance", "trip_duration"]
+    if flows is not None:
+        df_flow = flows.rename(columns = {"station_id": "start_id"})
+        df_flow["weekly_date"] = df_flow["period"] - pd.to_timedelta(df_flow["period"].dt.weekday, unit = "D")
+        df_flow = df_flow.groupby(["start_id", "weekly_date"])[["arrivals", "net_flow"]].sum().reset_index()
+        df_regression = pd.merge(df_regression,
+                                 df_flow,
+                                 on = ["start_id", "weekly_date"],
+                                 how = "left")
+        df_regression = df_regression.fillna({"arrivals": 0, "net_flow": 0})
+        outcomes = outcomes + ["arrivals", "net_flow"]
+
+    # Convert Treatment Variables to Binary
+    df_regression['post'] = df_regression['post'].astype(df_regression['post'].dtype)
+    df_regression['treated'] = df_regression['treated'].astype(df_regression['treated'].dtype)
+
+    # Seasonally Adjust Outcome Variables
+    df_regression = df_regression.sort_values(by=['start_id', 'weekly_date'])
+    df_regression.set_index('weekly_date', inplace=True)
+    for outcome in outcomes:
+        outcome_sa = f"{outcome}_sa"
+        df_regression[outcome_sa] = df_regression.groupby('start_id')[outcome].transform(
+            lambda x: seasonal_decompose(x, model='additive', period=52).resid + seasonal_decompose(x, model='additive', period=52).trend
+        )
+
+    # Weather
+    df_weather = pd.DataFrame()
+    for year in range(2014,2025):
+        df_weather_temp = pd.read_csv(filepath + f"weather/{year}.csv")
+        df_weather = pd.concat([df_weather, df_weather_temp])
+
+    df_weather = df_weather.rename(columns = {"Year": "year",
+                                              "Month": "month",
+                                              "Day": "day",
+                                              "Mean Temp (°C)": "temp",
+                                              "Total Precip (mm)": "precip",
+                                              "Snow on Grnd (cm)": "snow_ground"})
+    df_weather['snow_ground'] = df_weather['snow_ground'].fillna(0)
+
+    df_weather['date'] = pd.to_datetime(df_weather[['year', 'month', 'day']])
+    df_weather['weekly_date'] = df_weather['date'] - pd.to_timedelta(df_weather['date'].dt.weekday, unit='d')
+    df_weather = df_weather.groupby("weekly_date").agg(
+        {"temp": "mean",
+         "precip": "mean",
+         "snow_ground": "mean"}).reset_index()
+    df_regression = pd.merge(df_regression,
+                             df_weather[["weekly_date", "temp", "precip", "snow_ground"]],
+                             on = "weekly_date",
+                             how = "left")
+
+    # Spatial Features, Including Distance to Central Business District, by Station-Year
+    df_features = spatial_features(station_year_table(df_regression))
+    df_regression = broadcast_features(df_regression, df_features)
+
+    # Monthly Dummies
+    df_regression['month'] = pd.to_datetime(df_regression['weekly_date']).dt.month
+    month_dummies = pd.get_dummies(df_regression['month'], prefix='month')
+    df_regression = pd.concat([df_regression, month_dummies], axis=1)
+    for col in df_regression.columns:
+        if 'month_' in col:
+            df_regression[col] = df_regression[col].astype(int)
+
+    # Return DataFrame
+    return df_regression
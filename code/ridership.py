@@ -0,0 +1,146 @@
+#%% Ridership: Importing, Cleaning, and Rectangularizing Bixi Trip Data
+# Libraries
+import os
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from reader import read_trips
+from crosswalk import compile_crosswalk, assign_station_ids, match_rate
+
+
+# Define Function for Importing Bixi Trip Data
+def import_data(filepath = ""):
+    df = pd.DataFrame()
+    for year in tqdm(range(2014,2025)):
+        # Years with Bixi Trip Data Stored in Single File
+        file = filepath + f"data/ridership/{year}/data_{year}.csv"
+        if os.path.exists(file):
+            df_temp = read_trips(file)
+
+        # Years with Bixi Trip Data Stored Across Many Files
+        else:
+            df_temp = pd.DataFrame()
+            for month in range(1,13):
+                if month < 10:
+                    file = filepath + f"data/ridership/{year}/OD_{year}-0{month}.csv"
+                else:
+                    file = filepath + f"data/ridership/{year}/OD_{year}-{month}.csv"
+                if os.path.exists(file):
+                    df_month = read_trips(file)
+                    df_temp = pd.concat([df_temp, df_month])
+
+        # Merge in Bixi Station Names
+        if any('name' in col.lower() and 'unnamed' not in col.lower() for col in df_temp.columns):
+            pass
+        else:
+            for type in ["start", "end"]:
+                df_temp = df_temp.rename(columns = {f"{type}_station_code": "code"})
+                df_temp['code'] = pd.to_numeric(df_temp['code'], errors='coerce').astype('Int64')
+                df_temp = pd.merge(df_temp,
+                                   pd.read_csv(filepath + f"data/ridership/{year}/Stations_{year}.csv",
+                                               usecols = ["code", "name"],
+                                               dtype = {"code": "Int64"},
+                                               low_memory = False,
+                                               engine = "c"),
+                                   on = "code",
+                                   how = "left")
+                df_temp = df_temp.rename(columns = {"code": f"{type}_station_code",
+                                                    "name": f"{type}_name"})
+
+        # Append Data
+        df = pd.concat([df, df_temp])
+
+    # Create Year Variable
+    df["year"] = df["start_date"].dt.year
+
+    # Gather ID and Coordinates for Bixi Stations
+    crosswalk = compile_crosswalk(filepath + "data/ridership/id_crosswalk.xlsx",
+                                  filepath + "data/ridership/id_crosswalk.npz")
+    for type in ["start", "end"]:
+        df = assign_station_ids(df, crosswalk, type)
+
+    # Report Crosswalk Match Rate by Year
+    print(match_rate(df))
+
+    # Return DataFrame
+    return df
+
+
+# Define Function for Selecting Modal Bixi Station Name and Coordinates
+def replace_with_mode(group, type, target):
+    # Construct the column name using type and target
+    col_name = f"{type}_{target}"
+    # Use pandas mode to find the most frequent value
+    mode_series = group[col_name].mode()
+    if not mode_series.empty:
+        # Gather Mode and Perform Replacement
+        mode_value = mode_series[0]
+        group[col_name] = mode_value
+    return group
+
+
+# Defne Function for Cleaning Imported Data
+def clean_data(df):
+    # Replace Name with Modal Name by Bixi Station ID
+    for type in ["start", "end"]:
+        grouped = df.groupby(f'{type}_id', dropna = False)
+        df = grouped.apply(lambda group: replace_with_mode(group, type, target = "name"))
+        df = df.reset_index(drop=True)
+
+    # Replace Coordinates with Modal Coordinates by Bixi Station ID-Year
+    for type in ["start", "end"]:
+        grouped = df.groupby([f'{type}_id', 'year'], dropna = False)
+        for target in ["lat", "long"]:
+            df = grouped.apply(lambda group: replace_with_mode(group, type, target))
+            df = df.reset_index(drop=True)
+
+    # Return DataFrame
+    return df
+
+
+# Define Function for Calculating Distance Between Stations
+def haversine_distance(data, lat1, long1, lat2, long2):
+    # Radius of Earth
+    R = 6371.0
+
+    # Convert Coordinates to Radians
+    lat1_rad = np.radians(data[lat1])
+    lon1_rad = np.radians(data[long1])
+    lat2_rad = np.radians(data[lat2])
+    lon2_rad = np.radians(data[long2])
+
+    # Take Difference in Coordinates
+    dlat = lat2_rad - lat1_rad
+    dlon = lon2_rad - lon1_rad
+
+    # Apply Haversine Distance Formula
+    a = np.sin(dlat / 2)**2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(dlon / 2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    # Calculate Distance
+    distance = (R * c)
+
+    return distance
+
+
+# Define Function for Creating Trip-Level Outcome Variables
+def trip_outcomes(df):
+    # Number of Trips
+    df["trip_count"] = 1
+
+    # Trip Distance
+    df['trip_distance'] = haversine_distance(df, "start_lat", "start_long", "end_lat", "end_long")
+
+    # Trip Duration
+    df["trip_duration"] = (df['end_date'] - df['start_date']).dt.total_seconds() / 60
+    return df
+
+
+# Define Function for Summarizing Coordinates and Name by Bixi Station-Year
+def station_table(df):
+    df_stations = df.groupby(["start_id", "year"]).agg(
+        start_lat = ("start_lat", "mean"),
+        start_long = ("start_long", "mean"),
+        start_name = ("start_name", "first")).reset_index()
+    return df_stations
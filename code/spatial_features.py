@@ -0,0 +1,99 @@
+#%% Spatial Features: Neighbourhood and Spillover Controls by Bixi Station-Year
+# Libraries
+import warnings
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+
+# Radius of Earth (Kilometers) and Central Business District Coordinates
+EARTH_RADIUS = 6371.0
+CBD_COORDS = (45.49963, -73.57092)
+
+
+# Define Function for Converting Coordinates to Points on Unit Sphere
+def unit_vectors(lat, long):
+    lat = np.radians(np.asarray(lat, dtype = np.float64))
+    long = np.radians(np.asarray(long, dtype = np.float64))
+    return np.column_stack([np.cos(lat) * np.cos(long), np.cos(lat) * np.sin(long), np.sin(lat)])
+
+
+# Define Functions for Converting Between Haversine and Chord Distances
+def to_chord(distance):
+    return 2 * np.sin(np.asarray(distance) / (2 * EARTH_RADIUS))
+
+
+def to_haversine(chord):
+    return 2 * EARTH_RADIUS * np.arcsin(np.clip(np.asarray(chord) / 2, 0, 1))
+
+
+# Define Function for Summarizing Coordinates, Treatment, and Ridership by Station-Year
+def station_year_table(data):
+    df_stations = data.assign(year = pd.to_datetime(data["weekly_date"]).dt.year).groupby(["start_id", "year"]).agg(
+        start_lat = ("start_lat", "mean"),
+        start_long = ("start_long", "mean"),
+        treated = ("treated", "first"),
+        trip_count = ("trip_count", "sum")).reset_index()
+    return df_stations.dropna(subset = ["start_lat", "start_long"])
+
+
+# Define Function for Computing Spatial Features Once per Station-Year
+def spatial_features(df_stations, radii = [0.25, 0.5, 1.0], k = 5):
+    # Previous-Year Ridership by Active Station, so Inactive Neighbours Enter Lag as Missing
+    df_active = df_stations[df_stations["trip_count"] > 0]
+    ridership = df_active.set_index(["start_id", "year"])["trip_count"]
+    cbd = unit_vectors([CBD_COORDS[0]], [CBD_COORDS[1]])
+
+    # Iterate Over Years, Building One Tree per Year over Stations with at Least One Trip
+    features = []
+    for year, group in df_stations.groupby("year"):
+        V = unit_vectors(group["start_lat"], group["start_long"])
+        active = (group["trip_count"] > 0).to_numpy()
+        tree = cKDTree(V[active])
+        df_year = group[["start_id", "year"]].copy()
+
+        # Distance to Central Business District
+        df_year["cbd_distance"] = to_haversine(np.linalg.norm(V - cbd, axis = 1))
+
+        # Number of Neighbouring Active Stations Within Each Radius, Excluding Station Itself
+        for radius in radii:
+            df_year[f"neighbours_{int(radius * 1000)}m"] = tree.query_ball_point(V, to_chord(radius), return_length = True) - active
+
+        # Distance to Nearest Active Treated Station, Other Than Station Itself
+        is_treated = (group["treated"] == 1).to_numpy() & active
+        df_year["treated_distance"] = np.nan
+        if is_treated.any():
+            k_treated = min(2, is_treated.sum())
+            distances, _ = cKDTree(V[is_treated]).query(V, k = k_treated)
+            distances = distances.reshape(len(V), k_treated)
+            nearest = distances[:, 0].copy()
+            nearest[is_treated] = distances[is_treated, 1] if k_treated == 2 else np.inf
+            df_year["treated_distance"] = np.where(np.isfinite(nearest), to_haversine(np.where(np.isfinite(nearest), nearest, 0)), np.nan)
+
+        # Average Previous-Year Ridership of k Nearest Neighbouring Active Stations,
+        # Dropping Station Itself if Active and Farthest Match Otherwise
+        df_year["neighbour_lag_ridership"] = np.nan
+        k_query = min(k + 1, active.sum())
+        if k_query > 1:
+            _, neighbours = tree.query(V, k = k_query)
+            neighbours = neighbours.reshape(len(V), k_query)
+            neighbours = np.where(active[:, None], neighbours[:, 1:], neighbours[:, :-1])
+            neighbour_ids = group["start_id"].to_numpy()[active][neighbours]
+            lagged = ridership.reindex(pd.MultiIndex.from_arrays([neighbour_ids.ravel(), np.full(neighbour_ids.size, year - 1)])).to_numpy()
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", category = RuntimeWarning)
+                df_year["neighbour_lag_ridership"] = np.nanmean(lagged.reshape(neighbour_ids.shape), axis = 1)
+
+        features.append(df_year)
+
+    # Return Station-Year Features
+    return pd.concat(features, ignore_index = True)
+
+
+# Define Function for Broadcasting Station-Year Features onto Panel by Index
+def broadcast_features(data, df_features):
+    index = pd.MultiIndex.from_arrays([data["start_id"], pd.to_datetime(data["weekly_date"]).dt.year])
+    df_broadcast = df_features.set_index(["start_id", "year"]).reindex(index)
+    for col in df_broadcast.columns:
+        data[col] = df_broadcast[col].to_numpy()
+    return data
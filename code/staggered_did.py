@@ -0,0 +1,180 @@
+#%% Staggered DiD: Group-Time Treatment Effects Across Bike Path Openings
+# Libraries
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Identify REV Segments by Axis
+REV_AXIS1 = [21598, 24146, 21597, 21599, 21355, 23819, 21601, 21601, 21027, 21026, 21600, 21601, 24147, 21025, 21024, 26063, 25554, 25912, 25913, 25911, 21023, 25553, 21030, 23821, 21029, 21357, 21356, 21028, 21359, 25584, 21358, 25585, 25796, 25833, 26136, 25866, 21360, 24187, 22907, 25865, 25627, 22906, 25626, 22905, 25618, 20705, 25617, 20704, 25616, 24826, 22908, 25615, 20726, 20725, 20724, 24635, 24031, 24342, 25218, 25609, 25608, 25607, 25878, 26137, 25613, 25848, 26139, 26140, 25849, 25851, 26142, 25850, 26141, 25813, 26138, 25634, 25633, 25632, 25233, 22212, 25631, 20181, 25874, 25526, 22186, 33616, 33618, 33617, 33620, 33622, 33621, 33619, 33624, 33626, 33625, 33623, 33628, 33630, 33629, 33627, 25241, 25641, 30443]
+
+# Radius of Earth (Meters) and Reference Latitude for Local Projection
+EARTH_RADIUS = 6371000.0
+REFERENCE_LAT = 45.5
+
+
+# Define Function for Projecting Coordinates onto Local Plane (Meters)
+def project(lat, long):
+    x = EARTH_RADIUS * np.cos(np.radians(REFERENCE_LAT)) * np.radians(np.asarray(long, dtype = np.float64))
+    y = EARTH_RADIUS * np.radians(np.asarray(lat, dtype = np.float64))
+    return np.column_stack([x, y])
+
+
+# Define Function for Gathering Path Segments by Cohort
+def cohort_segments(df_paths, cohorts):
+    starts, ends, labels = [], [], []
+    for k, cohort in enumerate(cohorts.itertuples()):
+        for geometry in df_paths.loc[df_paths["ID_CYCL"].isin(cohort.id_cycl), "geometry"]:
+            lines = geometry.geoms if hasattr(geometry, "geoms") else [geometry]
+            for line in lines:
+                coords = np.asarray(line.coords)[:, :2]
+                points = project(coords[:, 1], coords[:, 0])
+                starts.append(points[:-1])
+                ends.append(points[1:])
+                labels.append(np.full(len(points) - 1, k))
+    return np.concatenate(starts), np.concatenate(ends), np.concatenate(labels)
+
+
+# Define Function for Assigning Bixi Stations to Cohorts in One Spatial Pass
+def assign_cohorts(stations, df_paths, cohorts, treated_threshold = 100, control_threshold = 300, chunk_size = 64):
+    # Gather Segments, Grouped by Cohort
+    A, B, labels = cohort_segments(df_paths, cohorts)
+    order = np.argsort(labels, kind = "stable")
+    A, B, labels = A[order], B[order], labels[order]
+    present = np.unique(labels)
+    bounds = np.searchsorted(labels, present)
+    AB = B - A
+    AB_len = np.maximum((AB**2).sum(axis = 1), 1e-12)
+
+    # Distance from Every Station to Nearest Segment of Every Cohort, in Station Chunks
+    P = project(stations["start_lat"], stations["start_long"])
+    distance = np.full((len(P), len(cohorts)), np.inf)
+    for lo in range(0, len(P), chunk_size):
+        AP = P[lo:lo + chunk_size, None, :] - A[None, :, :]
+        t = np.clip((AP * AB).sum(axis = 2) / AB_len, 0, 1)
+        d = np.sqrt(((AP - t[:, :, None] * AB)**2).sum(axis = 2))
+        distance[lo:lo + chunk_size, present] = np.minimum.reduceat(d, bounds, axis = 1)
+
+    # Assign Each Station to Earliest Cohort Within Treated Threshold
+    opening = cohorts["opening_date"].to_numpy(dtype = "datetime64[ns]")
+    within = distance <= treated_threshold
+    first = np.where(within, opening.astype("int64")[None, :], np.iinfo(np.int64).max).argmin(axis = 1)
+    treated = within.any(axis = 1)
+
+    # Never-Treated Controls Lie Beyond Treated Threshold of All Cohorts, but Within Control Threshold of One
+    min_distance = distance.min(axis = 1)
+    df_cohorts = pd.DataFrame({"start_id": stations["start_id"].to_numpy(),
+                               "cohort": np.where(treated, cohorts["cohort"].to_numpy()[first], None),
+                               "opening_date": np.where(treated, opening[first], np.datetime64("NaT")),
+                               "path_distance": min_distance})
+    df_cohorts["control"] = ~treated & (min_distance <= control_threshold)
+
+    # Return Cohort Assignment
+    return df_cohorts
+
+
+# Define Function for Estimating All Group-Time ATTs of One Cohort
+def cohort_att(args):
+    panel_path, group_rows, control_rows, g, periods = args
+    Y = np.load(panel_path, mmap_mode = "r")
+    Y_group = np.asarray(Y[group_rows], dtype = np.float64)
+    Y_control = np.asarray(Y[control_rows], dtype = np.float64)
+
+    # Long Differences Relative to Last Pre-Treatment Period, by Station and Period
+    base = g - 1
+    D_group = Y_group - Y_group[:, [base]]
+    D_control = Y_control - Y_control[:, [base]]
+    results = []
+    for t in range(len(periods)):
+        if t == base:
+            continue
+        d_group = D_group[:, t]
+        d_control = D_control[:, t]
+        att = d_group.mean() - d_control.mean()
+        se = np.sqrt(d_group.var(ddof = 1) / len(d_group) + d_control.var(ddof = 1) / len(d_control)) if len(d_group) > 1 else np.nan
+        results.append((t, att, se, len(d_group)))
+    return results, D_group, D_control
+
+
+# Define Function for Estimating Group-Time ATTs in Parallel
+def group_time_att(Y, station_ids, periods, df_cohorts, workers = None):
+    # Locate Control Stations and Treated Stations of Each Cohort
+    row = pd.Series(np.arange(len(station_ids)), index = station_ids)
+    control_rows = row.reindex(df_cohorts.loc[df_cohorts["control"], "start_id"]).dropna().to_numpy(dtype = int)
+    cohorts = []
+    for (cohort, opening_date), group in df_cohorts.dropna(subset = ["cohort"]).groupby(["cohort", "opening_date"]):
+        # First Treated Period Is the One Containing Opening, so Base Period Is Entirely Pre-Treatment
+        g = int(np.searchsorted(periods, np.datetime64(opening_date), side = "right")) - 1
+        group_rows = row.reindex(group["start_id"]).dropna().to_numpy(dtype = int)
+        if g < 1 or g >= len(periods) or len(group_rows) == 0:
+            continue
+        cohorts.append((cohort, g, group_rows))
+
+    # Write Outcome Panel Once, Shared Read-Only Across Workers, and Estimate Cohorts in Parallel
+    with tempfile.TemporaryDirectory() as directory:
+        panel_path = os.path.join(directory, "panel.npy")
+        np.save(panel_path, np.asarray(Y, dtype = np.float32))
+        tasks = [(panel_path, group_rows, control_rows, g, periods) for _, g, group_rows in cohorts]
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            results = list(executor.map(cohort_att, tasks))
+    labels = [(cohort, g) for cohort, g, _ in cohorts]
+
+    # Group-Time ATTs
+    rows = [{"cohort": cohort,
+             "group_period": periods[g],
+             "period": periods[t],
+             "event_time": t - g,
+             "att": att,
+             "std_err": se,
+             "n_stations": n}
+            for (cohort, g), (result, _, _) in zip(labels, results) for t, att, se, n in result]
+
+    # Station-Level Differences by Cohort, for Standard Errors of Aggregates; Control Rows Share One Order
+    differences = {cohort: (g, D_group, D_control) for (cohort, g), (_, D_group, D_control) in zip(labels, results)}
+
+    # Return Group-Time ATTs and Station-Level Differences
+    return pd.DataFrame(rows), differences
+
+
+# Define Function for Standard Error of Weighted Average of Group-Time ATTs from Station-Level Influence Function
+def aggregate_std_err(cells, differences):
+    # Each Treated Station Belongs to One Cohort, While Control Stations Are Shared Across Cohorts
+    variance = 0.0
+    psi_control = 0.0
+    for cohort, cohort_cells in cells.groupby("cohort"):
+        g, D_group, D_control = differences[cohort]
+        t = g + cohort_cells["event_time"].to_numpy()
+        w = cohort_cells["weight"].to_numpy()
+        psi_group = D_group[:, t] @ w
+        variance += psi_group.var(ddof = 1) / len(psi_group) if len(psi_group) > 1 else np.nan
+        psi_control = psi_control + D_control[:, t] @ w
+    variance += np.var(psi_control, ddof = 1) / np.size(psi_control)
+    return float(np.sqrt(variance))
+
+
+# Define Function for Aggregating Group-Time ATTs to Event Study and Overall ATT
+def aggregate_att(df_att, differences):
+    # Weight Cells by Cohort Size
+    df_att = df_att.assign(weight = df_att["n_stations"],
+                           weighted_att = df_att["n_stations"] * df_att["att"])
+
+    # Event Study, with Standard Errors Accounting for Control Stations Shared Across Cohorts
+    df_event = df_att.groupby("event_time").agg(
+        weight = ("weight", "sum"),
+        weighted_att = ("weighted_att", "sum"),
+        n_cohorts = ("cohort", "nunique")).reset_index()
+    df_event["att"] = df_event["weighted_att"] / df_event["weight"]
+    df_event["std_err"] = [aggregate_std_err(cells.assign(weight = cells["weight"] / cells["weight"].sum()), differences)
+                           for _, cells in df_att.groupby("event_time")]
+    df_event = df_event[["event_time", "att", "std_err", "n_cohorts"]]
+
+    # Overall ATT Across Post-Treatment Cells, with Standard Error from Stations' Average Post-Treatment Differences
+    df_post = df_att[df_att["event_time"] >= 0]
+    df_post = df_post.assign(weight = df_post["weight"] / df_post["weight"].sum())
+    overall = {"att": float((df_post["weight"] * df_post["att"]).sum()),
+               "std_err": aggregate_std_err(df_post, differences)}
+
+    # Return Aggregates
+    return df_event, overall
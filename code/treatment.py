@@ -0,0 +1,134 @@
+#%% Treatment: Assigning Bixi Stations to Treatment by Distance to REV Path
+# Libraries
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+from geopy.distance import geodesic
+
+
+# Define Function for Calculating Distance Between Point and Line
+def point_to_line_distance(point, start, end):
+    # Convert Coordinates to Arrays
+    point = np.array(point)
+    start = np.array(start)
+    end = np.array(end)
+
+    # Project Point Onto Line
+    line_vec = end - start
+    point_vec = point - start
+    line_len = np.dot(line_vec, line_vec)
+    projection = np.dot(point_vec, line_vec) / line_len
+
+    # Bound Projection Value Between 0 and 1
+    projection = max(0, min(1, projection))
+
+    # Find Closest Point to Line Segment
+    closest_point = start + projection * line_vec
+
+    # Calculate Distance Between Point and Closest Point on Line Segment
+    return geodesic(point, closest_point).meters
+
+
+# Define Function for Calculating Distance from Bixi Station to REV Path
+def station_to_path_distance(station_coords, path_coords, treated_threshold, control_threshold):
+    # Initialize Treatment Status
+    treated = None
+
+    # Initialize Minimum Distance
+    min_distance = float('inf')
+
+    # Iterate Over REV Path Segments
+    for i in range(len(path_coords) - 1):
+        start_vertex = (path_coords[i][1], path_coords[i][0])
+        end_vertex = (path_coords[i + 1][1], path_coords[i + 1][0])
+
+        # Calculate Distance from Bixi Station to Rev Path
+        distance = point_to_line_distance(station_coords, start_vertex, end_vertex)
+
+        # Treated
+        if distance <= treated_threshold:
+            return 1, distance
+
+        # Control
+        elif distance <= control_threshold:
+            treated = 0
+            if distance < min_distance:
+                min_distance = distance
+
+    # Return Treatment Status and Distance
+    if treated is not None:
+        # Handle case where no valid min_distance was found
+        return treated, min_distance if min_distance != float('inf') else None
+
+    # Other
+    return None, None
+
+
+# Define Function for Assigning Stations to Treatment
+def assign_stations_to_treatment(data, df_rev):
+    # Identify Unique Bixi Stations
+    unique_stations = data.groupby("start_id")[["start_lat","start_long"]].mean().reset_index()
+    unique_stations = unique_stations.dropna()
+
+    # Initialize Treatment Dictionary
+    treated_dict = {}
+
+    # Iterate Over Bixi Stations
+    for index, station_row in tqdm(unique_stations.iterrows(), total=unique_stations.shape[0]):
+        station_coords = (station_row['start_lat'], station_row['start_long'])
+        start_id = station_row["start_id"]
+
+        # Initialize Treatment Status and Distance to REV Path
+        treated = None
+        min_distance = float('inf')
+
+        # Iterate Over REV Path Segments
+        for _, path_row in df_rev.iterrows():
+            path_geometry = path_row['geometry']
+            coords_list = list(path_geometry.coords)
+
+            # Calculate Distance Between Bixi Station and REV Path Segment
+            result, distance = station_to_path_distance(station_coords,
+                                                        coords_list,
+                                                        treated_threshold = 100,
+                                                        control_threshold = 300)
+
+            # Treated
+            if result == 1:
+                treated = 1
+                min_distance = distance
+                break
+
+            # Control
+            elif result == 0:
+                treated = 0
+                if distance < min_distance:
+                    min_distance = distance
+
+        # Other
+        if treated == 0 and min_distance == float('inf'):
+            min_distance = None
+
+        # Store Treatment Status and Distance in Dictionary
+        treated_dict[start_id] = {"treated": treated,
+                                  "rev_distance": min_distance}
+
+    # Convert Dictionary to DataFrame
+    df_treated = pd.DataFrame.from_dict(treated_dict, orient='index').reset_index()
+    df_treated.columns = ['start_id', 'treated', 'rev_distance']
+
+    # Return Treatment Classification
+    return df_treated
+
+
+# Define Function for Merging Treatment and Post Variables onto Panel
+def add_treatment(data, df_treated, treatment_date = "2020-11-07", date_col = "start_date"):
+    # Create Treatment Variable
+    data = pd.merge(data,
+                    df_treated,
+                    on='start_id',
+                    how='left')
+
+    # Create Post Variable
+    data['post'] = (pd.to_datetime(data[date_col]) >= pd.Timestamp(treatment_date)).astype(int)
+    return data
@@ -0,0 +1,90 @@
+#%% Validation: Single-Pass Data-Quality Rules with Quarantine Table
+# Libraries
+import os
+import numpy as np
+import pandas as pd
+
+
+# Data-Quality Rules, One Bit Each
+RULES = {"missing_start_date": 0,
+         "missing_end_date": 1,
+         "duration_too_short": 2,
+         "duration_too_long": 3,
+         "zero_distance": 4,
+         "outside_montreal": 5,
+         "duplicate_trip": 6,
+         "unknown_station": 7}
+
+# Rules Whose Failing Trips Are Quarantined; Others Are Only Flagged
+QUARANTINE_RULES = ["missing_start_date",
+                    "missing_end_date",
+                    "duration_too_short",
+                    "duration_too_long",
+                    "outside_montreal",
+                    "duplicate_trip",
+                    "unknown_station"]
+
+# Montreal Bounding Box
+LAT_BOUNDS = (45.35, 45.75)
+LONG_BOUNDS = (-74.05, -73.40)
+
+
+# Define Function for Evaluating All Rules into Bitmask
+def rule_bitmask(data):
+    # Duplicates Are Only Identifiable in Years Recorded to the Second, as Group Rides Share Minute-Resolution Timestamps
+    has_seconds = (data["start_date"].dt.second != 0) | (data["end_date"].dt.second != 0)
+    second_resolution = has_seconds.groupby(data["year"]).transform("any").fillna(False).astype(bool).to_numpy()
+
+    # Evaluate Rules
+    duration = data["trip_duration"].to_numpy()
+    checks = {"missing_start_date": data["start_date"].isna().to_numpy(),
+              "missing_end_date": data["end_date"].isna().to_numpy(),
+              "duration_too_short": duration <= (1/60),
+              "duration_too_long": duration >= 1440,
+              "zero_distance": data["trip_distance"].to_numpy() == 0,
+              "outside_montreal": np.zeros(len(data), dtype = bool),
+              "duplicate_trip": data.duplicated(subset = ["start_id", "end_id", "start_date", "end_date"]).to_numpy() & second_resolution,
+              "unknown_station": (data["start_id"].isna() | data["end_id"].isna()).to_numpy()}
+    for type in ["start", "end"]:
+        lat = data[f"{type}_lat"].to_numpy()
+        long = data[f"{type}_long"].to_numpy()
+        checks["outside_montreal"] |= (lat < LAT_BOUNDS[0]) | (lat > LAT_BOUNDS[1]) | (long < LONG_BOUNDS[0]) | (long > LONG_BOUNDS[1])
+
+    # Combine Rules into Bitmask
+    mask = np.zeros(len(data), dtype = np.uint16)
+    for rule, failed in checks.items():
+        mask |= failed.astype(np.uint16) << RULES[rule]
+    return mask
+
+
+# Define Function for Counting Failures by Rule and Year
+def rule_counts(mask, years):
+    # Trips Without Start Date Are Counted Under Year -1
+    year_codes, year_values = pd.factorize(pd.Series(years).fillna(-1).astype(int), sort = True)
+    df_counts = pd.DataFrame({"year": year_values})
+    for rule, bit in RULES.items():
+        df_counts[rule] = np.bincount(year_codes,
+                                      weights = (mask >> bit) & 1,
+                                      minlength = len(year_values)).astype(int)
+    return df_counts
+
+
+# Define Function for Validating Trips and Quarantining Failing Rows
+def validate_trips(data, quarantine_path):
+    # Flag Trips in Single Pass
+    data["quality_flags"] = rule_bitmask(data)
+
+    # Count Failures by Rule and Year
+    df_counts = rule_counts(data["quality_flags"].to_numpy(), data["year"])
+
+    # Write Compact Quarantine Table of Failing Trips
+    quarantine_bits = np.uint16(sum(1 << RULES[rule] for rule in QUARANTINE_RULES))
+    failed = (data["quality_flags"].to_numpy() & quarantine_bits) > 0
+    os.makedirs(os.path.dirname(quarantine_path), exist_ok = True)
+    data.loc[failed, ["start_id", "end_id", "start_date", "end_date", "year", "quality_flags"]].to_parquet(quarantine_path, index = False)
+
+    # Drop Failing Trips
+    data = data[~failed]
+
+    # Return Validated Trips and Failure Counts
+    return data, df_counts